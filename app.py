@@ -1,10 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
-import pickle
+from typing import Any, Dict, List, Optional
+import time
 import numpy as np
-import pandas as pd
 from config.config import Config
+from src.admission import AdmissionController, AdmissionMiddleware, DeadlineExceeded
+from src.batching import MicroBatcher
+from src.binary_protocol import CONTENT_TYPES, decode_matrix, encode_predictions, max_body_bytes
+from src.reloader import ModelReloader
+from src.scoring import score_matrix
+from src.stream_scoring import (BodyStreamingResponse, format_csv, format_failure, format_ndjson,
+                                iter_line_chunks, parse_csv, parse_ndjson, read_header)
+from src.validation import validate_matrix, violation_messages
+from utils.cache import PredictionCache
 from utils.logger import setup_logger
+from utils.metrics import MetricsMiddleware, Registry
 
 logger = setup_logger('api')
 
@@ -32,10 +44,34 @@ class FeatureInput(BaseModel):
             }
         }
 
+class BatchFeatureInput(BaseModel):
+    instances: List[Dict[str, Any]]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "instances": [
+                    FeatureInput.Config.schema_extra["example"],
+                    {
+                        "Absences": 20,
+                        "ParentalSupport": 1,
+                        "Tutoring": 1,
+                        "StudyTimeWeekly": 4.5,
+                        "Extracurricular": 0,
+                        "Music": 0,
+                        "Sports": 1,
+                        "Ethnicity": 0
+                    }
+                ]
+            }
+        }
+
 app = FastAPI(
     title=Config.API_TITLE,
     description=Config.API_DESCRIPTION,
-    version=Config.API_VERSION
+    version=Config.API_VERSION,
+    # orjson encodes responses several times faster than the json module
+    default_response_class=ORJSONResponse
 )
 
 #--- Jika deploy dengan docker aktifkan Cors -----
@@ -47,46 +83,385 @@ app = FastAPI(
 #     allow_headers=["*"],
 # )
 
-# Load model and scaler at startup
+# Load model and scaler at startup; new versions are swapped in while serving
 try:
-    with open(Config.MODEL_PATH, 'rb') as f:
-        model = pickle.load(f)
-    with open(Config.SCALER_PATH, 'rb') as f:
-        scaler = pickle.load(f)
-    logger.info("Model and scaler loaded successfully")
+    models = ModelReloader(Config.SERVING_MODE)
+    logger.info(f"Model {models.current.version} loaded successfully (serving mode: {Config.SERVING_MODE})")
 except Exception as e:
     logger.error(f"Error loading model or scaler: {str(e)}")
     raise
 
+# Keys include the model version, so entries of a replaced model are never
+# served; they age out through the LRU and the TTL
+prediction_cache = PredictionCache(
+    max_size=Config.PREDICTION_CACHE_SIZE,
+    ttl=Config.PREDICTION_CACHE_TTL
+)
+
+micro_batcher = None
+if Config.MICRO_BATCHING_ENABLED:
+    micro_batcher = MicroBatcher(
+        max_batch_size=Config.MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=Config.MICRO_BATCH_MAX_WAIT_MS
+    )
+
+# Bounded in-flight requests, wait queue and deadlines for the scoring
+# endpoints; model calls then run on its thread pool, off the event loop
+admission = AdmissionController() if Config.ADMISSION_CONTROL_ENABLED else None
+# Path -> largest body read before the request queues for a slot
+ADMITTED_PATHS = {
+    '/predict': Config.PREDICT_MAX_BODY_BYTES,
+    '/predict/batch': Config.BATCH_MAX_BODY_BYTES,
+    '/predict/binary': max_body_bytes(Config.BINARY_MAX_ROWS)
+}
+
+def check_deadline(request):
+    if admission is not None:
+        try:
+            admission.check(request.state.deadline)
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+
+async def score(request, fn, *args):
+    """``fn(*args)``, on the admission pool unless the request's deadline has passed"""
+    if admission is None:
+        return fn(*args)
+    check_deadline(request)
+    return await admission.run(request.state.deadline, fn, *args)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Here rather than at import so that each serve.py worker warms up and
+    # watches on its own, after the fork
+    models.start()
+    if micro_batcher is not None:
+        await micro_batcher.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    models.stop()
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    if admission is not None:
+        admission.shutdown()
+
+# Instrumentation, exposed in Prometheus format on /metrics. Each serve.py
+# worker counts on its own, so every series carries the worker's pid
+metrics = Registry(process_label='pid')
+requests_total = metrics.counter('api_requests_total', 'HTTP requests handled', ['endpoint', 'status'])
+errors_total = metrics.counter('api_request_errors_total', 'HTTP requests answered with status >= 400', ['endpoint', 'status'])
+request_duration = metrics.histogram('api_request_duration_seconds', 'End-to-end request latency', ['endpoint'])
+requests_in_flight = metrics.gauge('api_requests_in_flight', 'Requests currently being handled', ['endpoint'])
+stage_duration = metrics.histogram('api_stage_duration_seconds', 'Latency of each request handling stage', ['endpoint', 'stage'])
+
+def cache_metrics():
+    stats = prediction_cache.stats()
+    return [
+        ('api_prediction_cache_hits_total', 'counter', 'Prediction cache hits', stats['hits']),
+        ('api_prediction_cache_misses_total', 'counter', 'Prediction cache misses', stats['misses']),
+        ('api_prediction_cache_evictions_total', 'counter', 'Prediction cache evictions', stats['evictions']),
+        ('api_prediction_cache_size', 'gauge', 'Entries in the prediction cache', stats['size']),
+        ('api_model_reloads_total', 'counter', 'Model versions swapped in while serving', models.reloads),
+        ('api_model_reload_failures_total', 'counter', 'Model versions that failed to load', models.failures)
+    ]
+
+def admission_metrics():
+    if admission is None:
+        return []
+    stats = admission.stats()
+    return [
+        ('api_admission_in_progress', 'gauge', 'Requests holding an admission slot', stats['in_progress']),
+        ('api_admission_queued', 'gauge', 'Requests waiting for an admission slot', stats['queued']),
+        ('api_admission_rejected_total', 'counter', 'Requests refused with 503 because the queue was full', stats['rejected']),
+        ('api_admission_expired_total', 'counter', 'Requests dropped with 504 because their deadline passed', stats['expired'])
+    ]
+
+metrics.add_collector(cache_metrics)
+metrics.add_collector(admission_metrics)
+
+def stage_timers(endpoint, stages):
+    return {stage: stage_duration.labels(endpoint=endpoint, stage=stage) for stage in stages}
+
+# parse covers JSON decoding and pydantic validation of the request, and the body read when
+# admission control is off (it reads bodies before queueing)
+PREDICT_STAGES = stage_timers('/predict', ['parse', 'validate', 'cache', 'predict', 'log'])
+BATCH_STAGES = stage_timers('/predict/batch', ['parse', 'validate', 'predict', 'log'])
+BINARY_STAGES = stage_timers('/predict/binary', ['predict'])
+
+def observe_parse(request, timer):
+    start = getattr(request.state, 'start_time', None)
+    if start is not None:
+        timer.observe(time.perf_counter() - start)
+
+def cache_key(features):
+    """Feature tuple in FEATURE_COLUMNS order with StudyTimeWeekly quantized.
+
+    The rounded value is clamped to the validated range, so a key never
+    stands for an input that validation would have refused.
+    """
+    values = [getattr(features, feature) for feature in Config.FEATURE_COLUMNS]
+    if Config.STUDY_TIME_QUANTUM > 0:
+        idx = Config.FEATURE_COLUMNS.index('StudyTimeWeekly')
+        bounds = Config.get_feature_range('StudyTimeWeekly')
+        rounded = round(values[idx] / Config.STUDY_TIME_QUANTUM) * Config.STUDY_TIME_QUANTUM
+        values[idx] = min(max(rounded, bounds['min']), bounds['max'])
+    return tuple(values)
+
 @app.post("/predict")
-async def predict(features: FeatureInput):
+async def predict(features: FeatureInput, request: Request):
+    observe_parse(request, PREDICT_STAGES['parse'])
+    # One version for the whole request, even if a new one is swapped in meanwhile
+    model = models.current
     try:
         # Validate input
-        for feature, value in features.dict().items():
-            if not Config.is_valid_feature_value(feature, value):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid value for {feature}"
-                )
+        with PREDICT_STAGES['validate'].time():
+            for feature in Config.FEATURE_COLUMNS:
+                if not Config.is_valid_feature_value(feature, getattr(features, feature)):
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Invalid value for {feature}"
+                    )
         
-        # Prepare input
-        feature_dict = features.dict()
-        input_df = pd.DataFrame([feature_dict])[Config.FEATURE_COLUMNS]
-        
-        # Scale features
-        input_scaled = scaler.transform(input_df)
-        
-        # Make prediction
-        prediction = model.predict(input_scaled)
-        final_prediction = float(prediction[0])
+        # Serve repeated feature combinations from the cache
+        key = None
+        if Config.PREDICTION_CACHE_ENABLED:
+            with PREDICT_STAGES['cache'].time():
+                key = cache_key(features)
+                cached = prediction_cache.get((model.version, key))
+            if cached is not None:
+                return ORJSONResponse({"prediction": cached, "model_version": model.version})
+            if Config.STUDY_TIME_QUANTUM > 0:
+                features = features.copy(update=dict(zip(Config.FEATURE_COLUMNS, key)))
+
+        # Make prediction straight from the validated model, or queue it
+        # to be scored together with concurrent requests
+        with PREDICT_STAGES['predict'].time():
+            if micro_batcher is not None:
+                check_deadline(request)
+                row = [getattr(features, feature) for feature in Config.FEATURE_COLUMNS]
+                final_prediction = await micro_batcher.submit(row, model.predictor)
+            else:
+                final_prediction = await score(request, model.predictor.predict_one, features)
+        if key is not None:
+            prediction_cache.set((model.version, key), final_prediction)
         
-        logger.info(f"Prediction made for input: {feature_dict}")
-        return {"prediction": final_prediction}
+        with PREDICT_STAGES['log'].time():
+            logger.info("Prediction made for input: %s", features.dict())
+        return ORJSONResponse({"prediction": final_prediction, "model_version": model.version})
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error making prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def instances_matrix(instances):
+    """Raw feature matrix of the batch rows, NaN where a value is missing or not a number"""
+    rows = [[instance.get(feature, np.nan) for feature in Config.FEATURE_COLUMNS] for instance in instances]
+    try:
+        return np.array(rows, dtype=np.float64)
+    except (TypeError, ValueError):
+        # A string or nested value somewhere: convert value by value
+        values = np.full((len(rows), len(Config.FEATURE_COLUMNS)), np.nan)
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                try:
+                    values[i, j] = float(value)
+                except (TypeError, ValueError):
+                    pass
+        return values
+
+@app.post("/predict/batch")
+async def predict_batch(batch: BatchFeatureInput, request: Request):
+    observe_parse(request, BATCH_STAGES['parse'])
+    if len(batch.instances) > Config.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(batch.instances)} exceeds limit of {Config.BATCH_MAX_SIZE}"
+        )
+
+    model = models.current
+    try:
+        predictions = [None] * len(batch.instances)
+
+        # Validate the whole matrix at once so one bad student does not reject the roster
+        with BATCH_STAGES['validate'].time():
+            values = instances_matrix(batch.instances)
+            invalid = validate_matrix(values)
+            valid_rows = ~invalid.any(axis=1)
+            errors = [{"index": idx, "detail": message}
+                      for idx, message in violation_messages(values, invalid).items()]
+
+        if valid_rows.any():
+            # One scaler pass and one model call for every valid row
+            with BATCH_STAGES['predict'].time():
+                batch_predictions = await score(request, model.predictor.predict, values[valid_rows])
+            for idx, value in zip(np.flatnonzero(valid_rows).tolist(), batch_predictions.tolist()):
+                predictions[idx] = value
+
+        with BATCH_STAGES['log'].time():
+            logger.info(
+                f"Batch prediction made for {len(batch.instances)} inputs "
+                f"({len(errors)} rejected)"
+            )
+        return ORJSONResponse({"predictions": predictions, "errors": errors, "model_version": model.version})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error making batch prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/binary")
+async def predict_binary(request: Request, x_dtype: str = Header('float64')):
+    """Score a columnar binary feature matrix (see src.binary_protocol for the formats).
+
+    Skips JSON and pydantic: the body is mapped onto a NumPy matrix,
+    validated in one pass and scored in one model call. The response uses
+    the request's format, with NaN/null predictions for invalid rows.
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip()
+    if content_type not in CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be one of {list(CONTENT_TYPES)}")
+    # Bound the upload itself, not just the decoded rows
+    limit = max_body_bytes(Config.BINARY_MAX_ROWS)
+    too_large = HTTPException(status_code=413, detail=f"Payload exceeds {limit} bytes ({Config.BINARY_MAX_ROWS} rows)")
+    length = request.headers.get('content-length', '')
+    if length.isdigit() and int(length) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+
+    model = models.current
+    try:
+        X = decode_matrix(body, content_type, x_dtype)
+    except ImportError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {content_type} payload: {str(e)}")
+    if len(X) > Config.BINARY_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(X)} exceeds limit of {Config.BINARY_MAX_ROWS}"
+        )
+
+    try:
+        with BINARY_STAGES['predict'].time():
+            predictions, errors = await score(request, score_matrix, X, model.predictor)
+        invalid_rows = np.flatnonzero(errors != '')
+        content = encode_predictions(predictions, invalid_rows, content_type, model.version)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error making binary prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=content, media_type=content_type, headers={
+        'X-Model-Version': model.version,
+        'X-Invalid-Rows': str(len(invalid_rows))
+    })
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """Score an NDJSON or CSV upload of any size, streaming predictions back as rows arrive.
+
+    Rows are parsed and scored ``Config.STREAM_SCORE_CHUNK_ROWS`` at a time
+    (off the event loop), so memory does not depend on the upload size.
+    Output is NDJSON or CSV like the input, one record per input row:
+    index, prediction, and an error for invalid rows.
+    """
+    content_type = request.headers.get('content-type', 'application/x-ndjson').split(';')[0].strip()
+    if content_type not in ('application/x-ndjson', 'application/jsonl', 'text/csv'):
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv")
+    model = models.current
+    body = request.stream()
+
+    if content_type == 'text/csv':
+        try:
+            header, rest = await read_header(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        missing = [c for c in Config.FEATURE_COLUMNS if c not in header]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"CSV header is missing columns: {missing}")
+        parse, write, media_type = (lambda lines: parse_csv(lines, header)), format_csv, 'text/csv'
+        first = b'index,prediction,error\n'
+    else:
+        rest = b''
+        parse, write, media_type, first = parse_ndjson, format_ndjson, 'application/x-ndjson', b''
+
+    def score_chunk(lines, start):
+        values, parse_errors = parse(lines)
+        predictions, errors = score_matrix(values, model.predictor)
+        for pos, message in parse_errors.items():
+            predictions[pos], errors[pos] = np.nan, message
+        return write(start, predictions, errors), int(sum(1 for e in errors if e))
+
+    async def results():
+        if first:
+            yield first
+        rows = rejected = 0
+        try:
+            async for lines in iter_line_chunks(body, buffer=rest):
+                output, n_rejected = await run_in_threadpool(score_chunk, lines, rows)
+                rows += len(lines)
+                rejected += n_rejected
+                yield output
+        except Exception as e:
+            # The status line is gone; report the failure in-band and stop
+            logger.error(f"Error in streamed prediction after {rows} rows: {str(e)}")
+            yield format_failure(e, csv=media_type == 'text/csv')
+            return
+        logger.info(f"Streamed predictions for {rows} inputs ({rejected} rejected)")
+
+    return BodyStreamingResponse(results(), media_type=media_type, headers={'X-Model-Version': model.version})
+
+@app.post("/admin/reload")
+async def admin_reload(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Load the model artifacts on disk in the background and swap them in.
+
+    Requires the X-Admin-Token header when ADMIN_TOKEN is set, otherwise
+    only accepts requests from localhost. With serve.py this reloads the
+    worker that took the request; the others follow through their watchers.
+    """
+    if Config.ADMIN_TOKEN:
+        if x_admin_token != Config.ADMIN_TOKEN:
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif request.client is None or request.client.host not in ('127.0.0.1', '::1'):
+        raise HTTPException(status_code=403, detail="Admin endpoints are limited to localhost without ADMIN_TOKEN")
+
+    previous = models.current.version
+    try:
+        await run_in_threadpool(models.reload, True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed, still serving {previous}: {str(e)}")
+    return {"previous_version": previous, "model_version": models.current.version}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return prediction_cache.stats()
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(content=metrics.expose(), media_type=Registry.CONTENT_TYPE)
+
+# Added first so it runs inside the metrics middleware, which then counts refusals
+if admission is not None:
+    app.add_middleware(AdmissionMiddleware, controller=admission, paths=ADMITTED_PATHS,
+                       wait=metrics.histogram('api_admission_wait_seconds',
+                                              'Time requests spent queued for an admission slot'))
+
+app.add_middleware(
+    MetricsMiddleware,
+    requests_total=requests_total,
+    errors_total=errors_total,
+    duration=request_duration,
+    in_flight=requests_in_flight,
+    endpoints={route.path for route in app.routes}
+)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=Config.HOST, port=Config.PORT)
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""Open-loop /predict load test with and without admission control.
+
+Starts ``app.py`` with uvicorn once with ``ADMISSION_CONTROL=0`` and once
+with it on, then sends requests at fixed arrival rates for
+``--duration`` seconds each, whether or not earlier ones have been
+answered, as a traffic spike does. Clients give up after
+``--client-timeout`` seconds. Reports goodput (200s per second), 503/504
+refusals, client timeouts and the p50/p99 latency of answered requests,
+measured from each request's scheduled send time. Run from the project
+root after ``python train.py``:
+
+    python -m benchmarks.bench_admission --rates 200 1000 3000 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from config.config import Config
+from benchmarks.bench_micro_batching import random_rows
+from benchmarks.bench_stream_scoring import wait_ready
+
+PORT = 8773
+
+
+def request_bytes(row, timeout_ms):
+    body = json.dumps(dict(zip(Config.FEATURE_COLUMNS, row))).encode()
+    return (f"POST /predict HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nX-Request-Timeout-Ms: {timeout_ms}\r\n\r\n").encode() + body
+
+
+async def send(pool, payload, scheduled, timeout, results):
+    """One request on a pooled keep-alive connection; records (status, latency)"""
+    connection = None
+    try:
+        connection = pool.pop() if pool else await asyncio.open_connection('127.0.0.1', PORT)
+        reader, writer = connection
+
+        async def exchange():
+            writer.write(payload)
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            return status
+
+        remaining = scheduled + timeout - time.perf_counter()
+        status = await asyncio.wait_for(exchange(), max(remaining, 0.001))
+        results.append((status, time.perf_counter() - scheduled))
+        pool.append(connection)
+    except (asyncio.TimeoutError, OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+        results.append((None, time.perf_counter() - scheduled))
+        if connection is not None:
+            connection[1].close()
+
+
+async def run_rate(rate, duration, rows, timeout_ms, client_timeout):
+    pool, results, tasks = [], [], []
+    payloads = [request_bytes(row, timeout_ms) for row in rows]
+    start = time.perf_counter()
+    for i in range(int(rate * duration)):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(send(pool, payloads[i % len(payloads)], scheduled, client_timeout, results)))
+    await asyncio.gather(*tasks)
+    for _, writer in pool:
+        writer.close()
+    return results
+
+
+def summarize(results, duration):
+    statuses = [status for status, _ in results]
+    ok = np.array([latency for status, latency in results if status == 200]) * 1e3
+    p50, p99 = (np.percentile(ok, 50), np.percentile(ok, 99)) if len(ok) else (float('nan'),) * 2
+    return (len(results), len(ok) / duration, statuses.count(503), statuses.count(504),
+            statuses.count(None), p50, p99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rates', type=float, nargs='+', default=[200, 1000, 3000], help="requests per second")
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--timeout-ms', type=float, default=Config.REQUEST_TIMEOUT_MS,
+                        help="X-Request-Timeout-Ms sent with every request")
+    parser.add_argument('--client-timeout', type=float, default=2.0, help="seconds before a client gives up")
+    args = parser.parse_args()
+
+    rows = random_rows(10000)
+    print(f"{'admission':>9} {'rate':>6} {'sent':>7} {'ok/s':>8} {'503':>6} {'504':>6} {'gave up':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    for enabled in ('0', '1'):
+        env = {**os.environ, 'ADMISSION_CONTROL': enabled, 'PREDICTION_CACHE': '0', 'MODEL_RELOAD_INTERVAL': '0',
+               'LOG_PREDICTION_SAMPLE_EVERY': '1000'}
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(PORT), '--no-access-log',
+             '--backlog', str(Config.SERVING_BACKLOG)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_ready(PORT)
+            for rate in args.rates:
+                results = asyncio.run(run_rate(rate, args.duration, rows, args.timeout_ms, args.client_timeout))
+                sent, goodput, shed, expired, gave_up, p50, p99 = summarize(results, args.duration)
+                print(f"{'on' if enabled == '1' else 'off':>9} {rate:>6.0f} {sent:>7} {goodput:>8,.0f} {shed:>6} "
+                      f"{expired:>6} {gave_up:>8} {p50:>8.1f} {p99:>8.1f}")
+                # Let the server drain before the next rate
+                time.sleep(args.client_timeout)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Rows/s and server CPU per row of JSON /predict/batch vs /predict/binary formats.
+
+Starts ``app.py`` with uvicorn and sends ``--requests`` batches of each
+size over one keep-alive connection per format with
+src.client.PredictionClient. Reports client-observed rows/s and the
+server process's CPU time per row (utime + stime from /proc). Formats
+whose optional dependency (msgpack, pyarrow) is missing are skipped.
+Run from the project root after ``python train.py``:
+
+    python -m benchmarks.bench_binary_protocol --batch-sizes 1 100 10000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from config.config import Config
+from src.binary_protocol import ARROW, MSGPACK, RAW
+from src.client import PredictionClient
+from benchmarks.bench_stream_scoring import wait_ready
+
+PORT = 8772
+FORMATS = {'json': None, 'raw': RAW, 'msgpack': MSGPACK, 'arrow': ARROW}
+DEPENDENCIES = {'msgpack': 'msgpack', 'arrow': 'pyarrow'}
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def available(name):
+    try:
+        __import__(DEPENDENCIES.get(name, 'json'))
+        return True
+    except ImportError:
+        return False
+
+
+def run(client, fmt, X, rows, n_requests):
+    """Seconds for ``n_requests`` requests; the first (warm-up) is not timed"""
+    if fmt == 'json':
+        send = lambda: client.predict_batch(rows)  # noqa: E731
+    else:
+        send = lambda: client.predict_matrix(X, FORMATS[fmt])  # noqa: E731
+    expected = send()
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        send()
+    return time.perf_counter() - start, expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 10000])
+    parser.add_argument('--requests', type=int, default=200, help="requests per format and batch size")
+    parser.add_argument('--formats', nargs='+', choices=list(FORMATS), default=list(FORMATS))
+    args = parser.parse_args()
+
+    formats = [f for f in args.formats if available(f)]
+    for skipped in set(args.formats) - set(formats):
+        print(f"skipping {skipped}: {DEPENDENCIES[skipped]} is not installed")
+
+    env = {**os.environ, 'PREDICTION_CACHE': '0', 'MODEL_RELOAD_INTERVAL': '0', 'LOG_PREDICTION_SAMPLE_EVERY': '1000'}
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(PORT), '--no-access-log'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    source = pd.read_csv(Config.DATA_PATH, usecols=Config.FEATURE_COLUMNS)[Config.FEATURE_COLUMNS]
+    rng = np.random.default_rng(Config.RANDOM_STATE)
+    try:
+        wait_ready(PORT)
+        print(f"{'format':>8} {'batch':>7} {'rows/s':>12} {'server us/row':>14}")
+        for size in args.batch_sizes:
+            sample = source.iloc[rng.integers(0, len(source), size)]
+            X, rows = sample.to_numpy(np.float64), sample.to_dict('records')
+            # Fewer requests for big batches so every size takes a similar time
+            n_requests = max(5, args.requests * 100 // max(size, 100))
+            reference = None
+            for fmt in formats:
+                client = PredictionClient(f"http://127.0.0.1:{PORT}")
+                try:
+                    cpu = cpu_seconds(server.pid)
+                    elapsed, predictions = run(client, fmt, X, rows, n_requests)
+                    cpu = cpu_seconds(server.pid) - cpu
+                finally:
+                    client.close()
+                predictions = np.asarray(predictions[0] if fmt == 'json' else predictions, dtype=np.float32)
+                if reference is None:
+                    reference = predictions
+                elif not np.allclose(predictions, reference, atol=1e-4, equal_nan=True):
+                    print(f"warning: {fmt} predictions differ from {formats[0]}")
+                total = n_requests * size
+                print(f"{fmt:>8} {size:>7} {total / elapsed:>12,.0f} {cpu / (n_requests + 1) / size * 1e6:>14.2f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
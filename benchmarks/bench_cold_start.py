@@ -0,0 +1,68 @@
+"""Cold-start time and memory of loading the model from pickles vs the bundle.
+
+Each case runs in a fresh interpreter, which imports ``src.inference``,
+loads the predictor and makes one prediction, then reports the load and
+first-prediction times, the resident memory and whether sklearn or
+XGBoost had to be imported. Run from the project root after
+``python train.py``:
+
+    python -m benchmarks.bench_cold_start --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CASES = [
+    ('xgboost', 'pickle'),
+    ('xgboost', 'bundle'),
+    ('compiled', 'pickle'),
+    ('compiled', 'bundle')
+]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from src.inference import load_predictor
+predictor = load_predictor()
+loaded = time.perf_counter()
+predictor.predict([[5, 3, 0, 15.0, 1, 1, 0, 2]])
+predicted = time.perf_counter()
+with open('/proc/self/status') as f:
+    rss = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+print(json.dumps({
+    'load': loaded - start,
+    'first': predicted - loaded,
+    'rss_kb': rss,
+    'sklearn': 'sklearn' in sys.modules,
+    'xgboost': 'xgboost' in sys.modules
+}))
+"""
+
+
+def run_case(mode, model_format):
+    env = {**os.environ, 'SERVING_MODE': mode, 'MODEL_FORMAT': model_format, 'LOG_ASYNC': '0'}
+    output = subprocess.run([sys.executable, '-c', CHILD], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="fresh processes per case (median reported)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'format':<8}{'load (ms)':>11}{'first (ms)':>12}{'RSS (MB)':>10}  imports")
+    for mode, model_format in CASES:
+        # One untimed run so every case reads the files from the page cache
+        run_case(mode, model_format)
+        runs = sorted((run_case(mode, model_format) for _ in range(args.repeat)), key=lambda r: r['load'])
+        median = runs[len(runs) // 2]
+        imports = ', '.join(name for name in ('sklearn', 'xgboost') if median[name]) or '-'
+        print(f"{mode:<10}{model_format:<8}{median['load'] * 1000:>11.1f}{median['first'] * 1000:>12.2f}"
+              f"{median['rss_kb'] / 1024:>10.1f}  {imports}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Load time and memory of the CSV vs the columnar dataset cache.
+
+Run from the project root:
+
+    python -m benchmarks.bench_dataset --rows 2000 1000000 10000000
+
+For each size a CSV is generated by resampling the real dataset into a
+temporary directory (about 70 bytes per row on disk), then read with
+``pd.read_csv`` and through ``src.dataset`` for all columns and for the
+training columns only.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config.config import Config
+from src.dataset import build_cache, load_columns, load_dataset
+
+TRAINING_COLUMNS = Config.FEATURE_COLUMNS + [Config.TARGET_COLUMN]
+
+
+def write_csv(path, rows, chunk_rows=1000000):
+    source = pd.read_csv(Config.DATA_PATH)
+    rng = np.random.default_rng(Config.RANDOM_STATE)
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        chunk = source.iloc[rng.integers(0, len(source), n)]
+        chunk.to_csv(path, mode='a', header=start == 0, index=False)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[2000, 1000000, 10000000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  {'reader':<28}{'time (s)':>10}{'memory (MB)':>13}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path, cache_dir = Path(tmp) / 'data.csv', Path(tmp) / 'cache'
+            write_csv(path, rows)
+
+            results = [
+                ('read_csv, all columns', lambda: pd.read_csv(path)),
+                ('read_csv, training columns', lambda: pd.read_csv(path, usecols=TRAINING_COLUMNS)),
+                ('cache build (once)', lambda: build_cache(path, cache_dir)),
+                ('cache, all columns', lambda: load_dataset(None, path, cache_dir)),
+                ('cache, training columns', lambda: load_dataset(TRAINING_COLUMNS, path, cache_dir)),
+                ('cache, training mmap', lambda: load_columns(TRAINING_COLUMNS, path, cache_dir))
+            ]
+            for label, fn in results:
+                elapsed, result = timed(fn)
+                memory = f"{megabytes(result):>13.1f}" if isinstance(result, pd.DataFrame) else f"{'-':>13}"
+                print(f"{rows:>10}  {label:<28}{elapsed:>10.3f}{memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Latency a prediction log line adds to /predict with each logging mode.
+
+Times the ``logger.info("Prediction made for input: %s", ...)`` call made
+on every request, using synchronous handlers, the background queue
+listener, and the queue listener with 1-in-N sampling. Console output
+goes to stderr, so run from the project root with it discarded:
+
+    python -m benchmarks.bench_logging --records 20000 2>/dev/null
+"""
+import argparse
+import time
+import numpy as np
+from utils.logger import setup_logger
+
+FEATURES = {
+    "Absences": 5, "ParentalSupport": 3, "Tutoring": 0, "StudyTimeWeekly": 15.0,
+    "Extracurricular": 1, "Music": 1, "Sports": 0, "Ethnicity": 2
+}
+
+
+def measure(logger, n):
+    timings = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        logger.info("Prediction made for input: %s", dict(FEATURES))
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--sample-every', type=int, default=100)
+    args = parser.parse_args()
+
+    loggers = {
+        'sync': setup_logger('bench_logging_sync', async_mode=False, sampling={}),
+        'queue': setup_logger('bench_logging_queue', async_mode=True, sampling={}),
+        f'queue 1/{args.sample_every}': setup_logger(
+            'bench_logging_sampled', async_mode=True,
+            sampling={'Prediction made for input': args.sample_every}
+        )
+    }
+
+    results = {name: measure(logger, args.records) for name, logger in loggers.items()}
+    print(f"{'mode':<16}{'mean (us)':>11}{'p50 (us)':>10}{'p99 (us)':>10}")
+    for name, timings in results.items():
+        print(f"{name:<16}{timings.mean():>11.2f}{np.percentile(timings, 50):>10.2f}{np.percentile(timings, 99):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
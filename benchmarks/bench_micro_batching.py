@@ -0,0 +1,84 @@
+"""Throughput vs. latency of inline single-row scoring and micro-batching.
+
+Simulates concurrent /predict callers inside one event loop, so the
+numbers isolate scheduling and model cost from HTTP overhead. Run from the
+project root after ``python train.py``:
+
+    python -m benchmarks.bench_micro_batching --requests 4000
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from config.config import Config
+from src.batching import MicroBatcher
+from src.inference import load_predictor
+from src.validation import feature_bounds
+
+
+def random_rows(n, seed=Config.RANDOM_STATE):
+    rng = np.random.default_rng(seed)
+    low, high = feature_bounds()
+    return np.floor(rng.uniform(low, high + 1, size=(n, len(low)))).clip(low, high).tolist()
+
+
+async def run_clients(score, rows, concurrency):
+    """Each client awaits one prediction at a time; returns (wall time, latencies)"""
+    latencies = []
+    queue = iter(rows)
+
+    async def client():
+        for row in queue:
+            start = time.perf_counter()
+            await score(row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, np.array(latencies) * 1e3
+
+
+async def benchmark(predictor, rows, concurrency, max_batch_size, max_wait_ms):
+    async def inline(row):
+        # What a blocking async endpoint does: yield once while the request
+        # is accepted, then score on the event loop and hold up everyone else
+        await asyncio.sleep(0)
+        return predictor.predict(np.array([row]))[0]
+
+    batcher = MicroBatcher(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    await batcher.start()
+    results = {
+        'inline': await run_clients(inline, rows, concurrency),
+        'batched': await run_clients(lambda row: batcher.submit(row, predictor), rows, concurrency)
+    }
+    stats = batcher.stats()
+    await batcher.stop()
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--mode', default=Config.SERVING_MODE)
+    parser.add_argument('--max-batch-size', type=int, default=Config.MICRO_BATCH_MAX_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=Config.MICRO_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    predictor = load_predictor(args.mode)
+    rows = random_rows(args.requests)
+
+    print(f"{'clients':>8}{'path':>9}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'batch':>8}")
+    for concurrency in (1, 4, 16, 64, 256):
+        results, stats = asyncio.run(
+            benchmark(predictor, rows, concurrency, args.max_batch_size, args.max_wait_ms)
+        )
+        for path, (wall, latencies) in results.items():
+            batch = f"{stats['mean_batch_size']:.1f}" if path == 'batched' else '1.0'
+            print(
+                f"{concurrency:>8}{path:>9}{len(rows) / wall:>10,.0f}"
+                f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 99):>10.2f}{batch:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
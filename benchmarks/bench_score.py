@@ -0,0 +1,46 @@
+"""Throughput and memory of score.py from 1 to N worker processes.
+
+Run from the project root after ``python train.py``:
+
+    python -m benchmarks.bench_score --rows 2000000 --max-workers 8
+
+A CSV of ``--rows`` resampled dataset rows is written to a temporary
+directory and scored with each worker count. Peak RSS is the largest
+single process (the parent or one worker), which should not grow with
+the file.
+"""
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+from benchmarks.bench_dataset import write_csv
+from config.config import Config
+from src.scoring import score_file
+from utils.resources import available_cpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--max-workers', type=int, default=available_cpus())
+    parser.add_argument('--mode', default=Config.SERVING_MODE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'data.csv'
+        write_csv(path, args.rows)
+
+        print(f"{'workers':>8}{'time (s)':>10}{'rows/s':>12}{'speedup':>9}{'peak RSS (MB)':>15}")
+        baseline = None
+        workers = 1
+        while workers <= args.max_workers:
+            rows, _, elapsed = score_file(path, Path(tmp) / 'scored.csv', args.mode, workers, progress_interval=3600)
+            baseline = baseline or elapsed
+            peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                          resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+            print(f"{workers:>8}{elapsed:>10.1f}{rows / elapsed:>12,.0f}{baseline / elapsed:>9.2f}{peak_kb / 1024:>15.1f}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
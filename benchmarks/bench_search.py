@@ -0,0 +1,43 @@
+"""Wall time, fits and accuracy of the hyperparameter search strategies.
+
+Run from the project root:
+
+    python -m benchmarks.bench_search --strategies grid halving tpe
+
+Each strategy searches the default grid and refits the best parameters;
+the CV score and the held-out test r2 show what the shortcut costs. The
+model is not saved (load_and_prepare_data rewrites scaler.pkl with the
+same contents).
+"""
+import argparse
+import time
+from sklearn.metrics import r2_score
+from src.data_preparation import load_and_prepare_data
+from src.model import create_pipeline
+from src.search import PARAM_GRID, run_search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--strategies', nargs='+', default=['grid', 'halving', 'tpe'])
+    parser.add_argument('--time-budget', type=float, default=None)
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test, _ = load_and_prepare_data()
+
+    print(f"{'strategy':>10}{'time (s)':>10}{'fits':>8}{'cv r2':>10}{'test r2':>10}  best parameters")
+    for strategy in args.strategies:
+        start = time.perf_counter()
+        try:
+            result = run_search(create_pipeline(), X_train, y_train, strategy, PARAM_GRID, args.time_budget)
+        except ImportError as e:
+            print(f"{strategy:>10}  skipped: {e}")
+            continue
+        elapsed = time.perf_counter() - start
+        test_r2 = r2_score(y_test, result.model.predict(X_test))
+        params = {name.split('__')[-1]: value for name, value in result.best_params.items()}
+        print(f"{strategy:>10}{elapsed:>10.1f}{result.n_fits:>8}{result.best.score:>10.4f}{test_r2:>10.4f}  {params}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Search time and peak memory with and without the shared per-fold DMatrix.
+
+Run from the project root:
+
+    python -m benchmarks.bench_shared_dmatrix --candidates 16 --rows 200000
+
+"per-fit" converts the NumPy fold to a DMatrix and recomputes the hist
+bins for every fit (the GridSearchCV behaviour); "shared" builds them once
+per fold. ``--rows`` resamples the training set to a larger size. Each
+mode runs in its own process so peak RSS is measured separately.
+"""
+import argparse
+import itertools
+import json
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+from sklearn.model_selection import ParameterGrid
+from config.config import Config
+from src.data_preparation import load_and_prepare_data
+from src.model import create_pipeline
+from src.search import PARAM_GRID, run_search
+
+MODES = {'per-fit': False, 'shared': True}
+
+
+def run(mode, candidates, rows):
+    X_train, _, y_train, _, _ = load_and_prepare_data()
+    if rows:
+        idx = np.random.default_rng(Config.RANDOM_STATE).integers(0, len(X_train), rows)
+        X_train, y_train = X_train[idx], np.asarray(y_train)[idx]
+    grid = list(itertools.islice(ParameterGrid(PARAM_GRID), candidates))
+    param_grid = [{name: [value] for name, value in params.items()} for params in grid]
+
+    Config.SHARED_DMATRIX = MODES[mode]
+    start = time.perf_counter()
+    result = run_search(create_pipeline(), X_train, y_train, 'grid', param_grid)
+    return {
+        'time': time.perf_counter() - start,
+        'fits': result.n_fits,
+        'score': result.best.score,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=16)
+    parser.add_argument('--rows', type=int, default=0, help="resample the training set to this many rows")
+    parser.add_argument('--mode', choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run(args.mode, args.candidates, args.rows)))
+        return
+
+    print(f"{'mode':>8}{'time (s)':>10}{'fits':>6}{'best r2':>10}{'peak RSS (MB)':>15}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_shared_dmatrix', '--mode', mode,
+             '--candidates', str(args.candidates), '--rows', str(args.rows)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>8}{stats['time']:>10.1f}{stats['fits']:>6}{stats['score']:>10.4f}{stats['peak_rss_mb']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Latency of the single-row /predict path: pandas + sklearn vs. the NumPy fast path.
+
+Run from the project root after ``python train.py``:
+
+    python -m benchmarks.bench_single_prediction --requests 5000
+"""
+import argparse
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from app import FeatureInput
+from config.config import Config
+from src.inference import XGBoostPredictor
+
+
+def random_inputs(n, seed=Config.RANDOM_STATE):
+    """Generate n valid FeatureInput objects"""
+    rng = np.random.default_rng(seed)
+    inputs = []
+    for _ in range(n):
+        values = {}
+        for feature in Config.FEATURE_COLUMNS:
+            ranges = Config.get_feature_range(feature)
+            if feature == 'StudyTimeWeekly':
+                values[feature] = float(rng.uniform(ranges['min'], ranges['max']))
+            else:
+                values[feature] = int(rng.integers(ranges['min'], ranges['max'] + 1))
+        inputs.append(FeatureInput(**values))
+    return inputs
+
+
+def legacy_predict(model, scaler, features):
+    """The original app.predict body: DataFrame -> scaler.transform -> model.predict"""
+    for feature, value in features.dict().items():
+        Config.is_valid_feature_value(feature, value)
+    feature_dict = features.dict()
+    input_df = pd.DataFrame([feature_dict])[Config.FEATURE_COLUMNS]
+    input_scaled = scaler.transform(input_df)
+    return float(model.predict(input_scaled)[0])
+
+
+def fast_predict(predictor, features):
+    """The current app.predict body"""
+    for feature in Config.FEATURE_COLUMNS:
+        Config.is_valid_feature_value(feature, getattr(features, feature))
+    return predictor.predict_one(features)
+
+
+def measure(fn, inputs):
+    timings, outputs = [], []
+    for features in inputs:
+        start = time.perf_counter()
+        outputs.append(fn(features))
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1e6, np.array(outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    with open(Config.MODEL_PATH, 'rb') as f:
+        model = pickle.load(f)
+    with open(Config.SCALER_PATH, 'rb') as f:
+        scaler = pickle.load(f)
+    predictor = XGBoostPredictor(model, scaler)
+    inputs = random_inputs(args.requests)
+
+    # Warm up both paths
+    for features in inputs[:50]:
+        legacy_predict(model, scaler, features)
+        fast_predict(predictor, features)
+
+    legacy_us, legacy_out = measure(lambda x: legacy_predict(model, scaler, x), inputs)
+    fast_us, fast_out = measure(lambda x: fast_predict(predictor, x), inputs)
+
+    mismatches = int(np.sum(legacy_out != fast_out))
+    print(f"requests: {args.requests}, mismatched predictions: {mismatches}")
+    print(f"{'path':<10}{'p50 (us)':>12}{'p99 (us)':>12}")
+    for name, timings in (('legacy', legacy_us), ('fast', fast_us)):
+        print(f"{name:<10}{np.percentile(timings, 50):>12.1f}{np.percentile(timings, 99):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Rows/s and server memory of /predict/stream for large NDJSON or CSV uploads.
+
+Starts ``app.py`` with uvicorn, uploads ``--rows`` generated rows with
+chunked transfer encoding while a second thread reads the streamed
+predictions, and reports throughput and the server's peak RSS (VmHWM).
+``--read-delay`` makes the reader pause after every 64 KB to show that a
+slow client stalls the upload instead of growing server memory. Run
+from the project root after ``python train.py``:
+
+    python -m benchmarks.bench_stream_scoring --rows 10000000 --format ndjson
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from config.config import Config
+
+PORT = 8771
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def peak_rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024
+
+
+def body_blocks(rows, fmt, block_rows=20000):
+    """Upload in blocks of resampled dataset rows"""
+    source = pd.read_csv(Config.DATA_PATH, usecols=Config.FEATURE_COLUMNS)
+    rng = np.random.default_rng(Config.RANDOM_STATE)
+    if fmt == 'csv':
+        yield (','.join(Config.FEATURE_COLUMNS) + '\n').encode()
+    for start in range(0, rows, block_rows):
+        block = source.iloc[rng.integers(0, len(source), min(block_rows, rows - start))]
+        if fmt == 'csv':
+            yield block.to_csv(index=False, header=False).encode()
+        else:
+            yield ('\n'.join(json.dumps(r) for r in block.to_dict('records')) + '\n').encode()
+
+
+def upload(sock, rows, fmt, sent):
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    sock.sendall((f"POST /predict/stream HTTP/1.1\r\nHost: localhost\r\nContent-Type: {content_type}\r\n"
+                  "Transfer-Encoding: chunked\r\n\r\n").encode())
+    for block in body_blocks(rows, fmt):
+        sock.sendall(f"{len(block):x}\r\n".encode() + block + b"\r\n")
+        sent[0] += len(block)
+    sock.sendall(b"0\r\n\r\n")
+
+
+def download(sock, read_delay, received):
+    """Read until the terminating zero-length chunk, counting result rows"""
+    tail = b''
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            break
+        received[0] += (tail + data).count(b'"index"') - tail.count(b'"index"')
+        received[1] += data.count(b'\n')
+        tail = (tail + data)[-16:]
+        if tail.endswith(b'\r\n0\r\n\r\n'):
+            break
+        if read_delay:
+            time.sleep(read_delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--read-delay', type=float, default=0.0, help="seconds the reader sleeps per 64 KB")
+    args = parser.parse_args()
+
+    env = {**os.environ, 'PREDICTION_CACHE': '0', 'MODEL_RELOAD_INTERVAL': '0'}
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(PORT), '--no-access-log'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(PORT)
+        baseline = peak_rss_mb(server.pid)
+        sock = socket.create_connection(('127.0.0.1', PORT))
+        sent, received = [0], [0, 0]
+        start = time.perf_counter()
+        writer = threading.Thread(target=upload, args=(sock, args.rows, args.format, sent))
+        writer.start()
+        download(sock, args.read_delay, received)
+        writer.join()
+        elapsed = time.perf_counter() - start
+        rows = received[0] if args.format == 'ndjson' else args.rows
+        print(f"{args.format}: {args.rows} rows, {sent[0] / 2**30:.2f} GB uploaded in {elapsed:.1f}s "
+              f"({rows / elapsed:,.0f} rows/s, {sent[0] / 2**20 / elapsed:.1f} MB/s)")
+        print(f"server peak RSS: {peak_rss_mb(server.pid):.1f} MB (after startup {baseline:.1f} MB)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Peak memory and time of out-of-core training as the dataset grows.
+
+Run from the project root:
+
+    python -m benchmarks.bench_streaming --rows 100000 1000000 10000000
+
+Each size is written to a temporary CSV (see bench_dataset) and trained
+with ``train_streaming`` in a fresh process, without saving artifacts.
+Peak RSS should stay flat while the time grows with the rows.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.bench_dataset import write_csv
+
+
+def run(path, n_estimators):
+    from src.dataset import remove_cache
+    from src.streaming import train_streaming
+    start = time.perf_counter()
+    try:
+        _, metrics = train_streaming({'n_estimators': n_estimators}, path=path, save=False)
+    finally:
+        remove_cache(path)
+    return {
+        'time': time.perf_counter() - start,
+        'test_r2': metrics['test_r2'],
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000, 10000000])
+    parser.add_argument('--n-estimators', type=int, default=50)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(run(args.path, args.n_estimators)))
+        return
+
+    print(f"{'rows':>10}{'csv (MB)':>10}{'time (s)':>10}{'test r2':>9}{'peak RSS (MB)':>15}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'data.csv'
+            write_csv(path, rows)
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_streaming', '--path', str(path),
+                 '--n-estimators', str(args.n_estimators)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            size = path.stat().st_size / 2**20
+            print(f"{rows:>10}{size:>10.0f}{stats['time']:>10.1f}{stats['test_r2']:>9.4f}{stats['peak_rss_mb']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
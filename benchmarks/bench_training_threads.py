@@ -0,0 +1,51 @@
+"""Training time for different outer CV jobs x inner XGBoost thread splits.
+
+Run from the project root:
+
+    python -m benchmarks.bench_training_threads --candidates 16
+
+Each split runs the same grid search over the first ``--candidates``
+combinations of the default grid. "oversubscribed" is the old setup:
+every core runs a CV job and every fit asks XGBoost for every core.
+"""
+import argparse
+import itertools
+import time
+from sklearn.model_selection import ParameterGrid
+from src.data_preparation import load_and_prepare_data
+from src.model import create_pipeline
+from src.search import PARAM_GRID, run_search
+from utils.resources import available_cpus, cgroup_cpu_limit
+
+
+def splits(cpus):
+    """(label, outer, inner) for every factorisation of cpus plus the oversubscribed baseline"""
+    for outer in range(1, cpus + 1):
+        if cpus % outer == 0:
+            yield f"{outer} x {cpus // outer}", outer, cpus // outer
+    yield "oversubscribed", cpus, cpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=16)
+    parser.add_argument('--cpus', type=int, default=None, help="defaults to the detected CPU count")
+    args = parser.parse_args()
+
+    cpus = args.cpus or available_cpus()
+    print(f"cpus: {cpus} (cgroup limit: {cgroup_cpu_limit()})")
+    X_train, _, y_train, _, _ = load_and_prepare_data()
+    candidates = list(itertools.islice(ParameterGrid(PARAM_GRID), args.candidates))
+    param_grid = [{name: [value] for name, value in params.items()} for params in candidates]
+
+    print(f"{'outer x inner':>16}{'time (s)':>10}{'fits/s':>10}")
+    for label, outer, inner in splits(cpus):
+        start = time.perf_counter()
+        result = run_search(create_pipeline(), X_train, y_train, 'grid', param_grid,
+                            outer_jobs=outer, inner_threads=inner)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>16}{elapsed:>10.1f}{result.n_fits / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Latency and throughput of the compiled NumPy tree evaluator vs. XGBoost.
+
+Run from the project root after ``python train.py``:
+
+    python -m benchmarks.bench_tree_ensemble --max-batch 100000
+"""
+import argparse
+import pickle
+import time
+import numpy as np
+from config.config import Config
+from src.tree_compiler import CompiledEnsemble
+
+
+def random_scaled_matrix(n, seed=Config.RANDOM_STATE):
+    """Scaled features in [0, 1] as the model sees them"""
+    rng = np.random.default_rng(seed)
+    return rng.random((n, len(Config.FEATURE_COLUMNS))).astype(np.float32)
+
+
+def best_time(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-batch', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(Config.MODEL_PATH, 'rb') as f:
+        model = pickle.load(f)
+    booster = model.named_steps['regressor'].get_booster()
+    ensemble = CompiledEnsemble.from_model(model)
+
+    print(f"trees: {ensemble.n_trees}, nodes: {len(ensemble.feature)}, depth: {ensemble.max_depth}")
+    print(f"{'batch':>8}{'xgb (ms)':>12}{'numpy (ms)':>12}{'xgb rows/s':>14}{'numpy rows/s':>14}{'max |diff|':>12}")
+
+    batch = 1
+    while batch <= args.max_batch:
+        X = random_scaled_matrix(batch)
+        expected = booster.inplace_predict(X)
+        max_diff = float(np.max(np.abs(ensemble.predict(X) - expected)))
+
+        xgb_time = best_time(lambda: booster.inplace_predict(X), args.repeats)
+        numpy_time = best_time(lambda: ensemble.predict(X), args.repeats)
+        print(
+            f"{batch:>8}{xgb_time * 1e3:>12.3f}{numpy_time * 1e3:>12.3f}"
+            f"{batch / xgb_time:>14,.0f}{batch / numpy_time:>14,.0f}{max_diff:>12.2e}"
+        )
+        batch *= 10
+
+
+if __name__ == "__main__":
+    main()
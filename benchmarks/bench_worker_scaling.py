@@ -0,0 +1,108 @@
+"""Request throughput and memory of serve.py from 1 to N workers.
+
+Starts ``serve.py`` for each worker count, drives it with keep-alive HTTP
+clients in separate processes, and reports req/s plus the workers' summed
+RSS and PSS (PSS splits shared copy-on-write pages between processes).
+Run from the project root after ``python train.py``:
+
+    python -m benchmarks.bench_worker_scaling --max-workers 8 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from config.config import Config
+
+PAYLOAD = json.dumps({
+    "Absences": 5, "ParentalSupport": 3, "Tutoring": 0, "StudyTimeWeekly": 15.0,
+    "Extracurricular": 1, "Music": 1, "Sports": 0, "Ethnicity": 2
+})
+HEADERS = {"Content-Type": "application/json"}
+
+
+def client(port, duration, counter):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    deadline = time.perf_counter() + duration
+    done = 0
+    while time.perf_counter() < deadline:
+        conn.request('POST', '/predict', PAYLOAD, HEADERS)
+        conn.getresponse().read()
+        done += 1
+    with counter.get_lock():
+        counter.value += done
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/docs')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def memory_kb(pid):
+    """(RSS, PSS) of one process from /proc"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0])
+    return values.get('Rss', 0), values.get('Pss', 0)
+
+
+def worker_pids(parent_pid):
+    with open(f'/proc/{parent_pid}/task/{parent_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--clients-per-worker', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8}{'clients':>9}{'req/s':>10}{'RSS (MB)':>10}{'PSS (MB)':>10}")
+    workers = 1
+    while workers <= args.max_workers:
+        env = dict(os.environ, SERVING_WORKERS=str(workers), PREDICTION_CACHE="0")
+        server = subprocess.Popen(
+            [sys.executable, 'serve.py'], env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_ready(Config.PORT)
+            n_clients = workers * args.clients_per_worker
+            counter = multiprocessing.Value('l', 0)
+            clients = [
+                multiprocessing.Process(target=client, args=(Config.PORT, args.duration, counter))
+                for _ in range(n_clients)
+            ]
+            for process in clients:
+                process.start()
+            time.sleep(args.duration / 2)
+            memory = [memory_kb(pid) for pid in worker_pids(server.pid)]
+            for process in clients:
+                process.join()
+
+            rss = sum(m[0] for m in memory) / 1024
+            pss = sum(m[1] for m in memory) / 1024
+            print(f"{workers:>8}{n_clients:>9}{counter.value / args.duration:>10,.0f}{rss:>10.1f}{pss:>10.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -10,16 +10,24 @@ class Config:
     
     # Data paths
     DATA_PATH = ARTIFACTS_DIR / "Student_performance_data _.csv"
+    DATASET_CACHE_DIR = BASE_DIR / ".cache" / "dataset"  # columnar copy of DATA_PATH (src/dataset.py)
+    DATASET_CHUNK_ROWS = 250000  # CSV rows parsed at a time while building it
     MODEL_PATH = ARTIFACTS_DIR / "best_model.pkl"
     SCALER_PATH = ARTIFACTS_DIR / "scaler.pkl"
     METRICS_PATH = ARTIFACTS_DIR / "metrics.json"
     FEATURE_IMPORTANCE_PATH = ARTIFACTS_DIR / "feature_importance.json"
+    COMPILED_MODEL_PATH = ARTIFACTS_DIR / "best_model_compiled.npz"
+    RAW_MODEL_PATH = ARTIFACTS_DIR / "best_model_raw.npz"
+    LATTICE_PATH = ARTIFACTS_DIR / "prediction_lattice.npy"
+    LATTICE_META_PATH = ARTIFACTS_DIR / "prediction_lattice.json"
     
     # Model parameters
     RANDOM_STATE = 42
     TEST_SIZE = 0.3
     NUM_FEATURES = 8
     TARGET_COLUMN = "GPA"
+    # Drop training rows outside DATA_VALIDATION instead of only reporting them
+    TRAIN_DROP_INVALID_ROWS = os.getenv("TRAIN_DROP_INVALID_ROWS", "0") == "1"
     
     # Feature columns for model
     FEATURE_COLUMNS = [
@@ -40,10 +48,66 @@ class Config:
     # Cross validation settings
     CV_FOLDS = 5
     
+    # Training cores (utils/resources.py): outer parallel CV jobs x inner
+    # XGBoost threads per fit; 0 = auto (cgroup-aware CPU count, one thread per job)
+    TRAIN_CPUS = int(os.getenv("TRAIN_CPUS", "0"))
+    TRAIN_OUTER_JOBS = int(os.getenv("TRAIN_OUTER_JOBS", "0"))
+    TRAIN_INNER_THREADS = int(os.getenv("TRAIN_INNER_THREADS", "0"))
+    
+    # Hyperparameter search (src/search.py)
+    TREE_METHOD = "hist"  # binned splits; the bins are shared by every CV fit
+    SHARED_DMATRIX = True  # build each fold's DMatrix once for all candidates
+    PIPELINE_CACHE_DIR = BASE_DIR / ".cache" / "pipeline"  # memoized preprocessing steps
+    SEARCH_STRATEGY = os.getenv("SEARCH_STRATEGY", "grid")  # "grid", "halving" or "tpe" (needs optuna)
+    EARLY_STOPPING_ROUNDS = 20  # used by the halving and tpe strategies
+    EARLY_STOPPING_FRACTION = 0.1  # share of each fold's training rows held out for early stopping
+    HALVING_MIN_ESTIMATORS = 25  # boosting rounds in the first halving rung
+    HALVING_FACTOR = 3  # keep the best 1/FACTOR and multiply the rounds by FACTOR each rung
+    TPE_TRIALS = 40
+    # Every (parameters, fold) score, so train.py resumes interrupted searches
+    # and reuses overlapping ones (src/search_results.py); None = off
+    SEARCH_RESULTS_PATH = ARTIFACTS_DIR / "search_results.sqlite"
+    
+    # Streaming training (src/streaming.py, train.py --streaming)
+    SPLIT_KEY_COLUMN = "StudentID"  # rows are assigned to train/test by a hash of this column
+    STREAM_CHUNK_ROWS = 100000
+    STREAM_CACHE_DIR = BASE_DIR / ".cache" / "xgboost"  # external-memory pages, removed after training
+    # approx reads the external-memory pages one at a time; hist would build
+    # its binned matrix for all rows in memory
+    STREAM_PARAMS = {
+        'tree_method': 'approx',
+        'n_estimators': 200,
+        'max_depth': 5,
+        'learning_rate': 0.1
+    }
+    
+    # Bulk scoring (src/scoring.py, score.py)
+    SCORE_CHUNK_BYTES = 8 * 2**20  # CSV bytes parsed and scored per task (about 100k rows)
+    SCORE_CHUNK_ROWS = 100000  # rows per task for Parquet input
+    SCORE_PROGRESS_INTERVAL = 5  # seconds between progress lines
+    
+    # train.py stage cache (src/stages.py): outputs of each stage by input hash
+    STAGE_CACHE_DIR = ARTIFACTS_DIR / "stages"
+    STAGE_CACHE_KEEP = 3  # versions kept per stage
+    
+    # Incremental retraining (src/incremental.py, train.py --incremental)
+    TRAINING_STATE_PATH = ARTIFACTS_DIR / "training_state.json"  # rows and digest the model was trained on
+    INCREMENTAL_MODE = "boost"  # "boost" adds INCREMENTAL_ROUNDS trees, "refresh" refits the existing leaves
+    INCREMENTAL_ROUNDS = 20
+    DRIFT_PSI_THRESHOLD = 0.2  # population stability index per feature, new rows vs training rows
+    DRIFT_MIN_ROWS = 100  # fewer new rows than this wait for a later run (too noisy for the drift check)
+    
     # Logging configuration
     LOG_FILE = LOGS_DIR / "app.log"
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     LOG_LEVEL = "INFO"
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "1") == "1"  # file/console I/O on a background thread
+    # Per-logger sampling: keep one in N INFO records starting with the prefix
+    LOG_SAMPLING = {
+        'api': {
+            'Prediction made for input': int(os.getenv("LOG_PREDICTION_SAMPLE_EVERY", "1"))
+        }
+    }
     
     # FastAPI settings
     API_TITLE = "Students GPA Prediction API"
@@ -51,6 +115,59 @@ class Config:
     API_VERSION = "1.0.0"
     HOST = "0.0.0.0"
     PORT = 8000
+    BATCH_MAX_SIZE = 10000  # rows accepted by /predict/batch
+    PREDICT_MAX_BODY_BYTES = 65536  # request body limits under admission control
+    BATCH_MAX_BODY_BYTES = BATCH_MAX_SIZE * 1024
+    BINARY_MAX_ROWS = 1000000  # rows accepted by /predict/binary
+    STREAM_SCORE_CHUNK_ROWS = 10000  # rows parsed and scored at a time by /predict/stream
+    STREAM_SCORE_MAX_LINE_BYTES = 65536  # longer lines end the stream with an error
+    
+    # Serving backend: "xgboost" (pickled pipeline), "compiled" (NumPy tree
+    # evaluator), "raw" (compiled trees with the scaler folded in) or
+    # "lattice" (precomputed prediction table)
+    SERVING_MODE = os.getenv("SERVING_MODE", "xgboost")
+    # "bundle": the xgboost and compiled modes load MODEL_BUNDLE_DIR (native
+    # booster, scaler array, memory-mapped trees, src/model_bundle.py) when
+    # it exists; "pickle": best_model.pkl and scaler.pkl
+    MODEL_FORMAT = os.getenv("MODEL_FORMAT", "bundle")
+    MODEL_BUNDLE_DIR = ARTIFACTS_DIR / "model"
+    MODEL_BUNDLE_KEEP = 3  # versions kept, including the live one
+    # Hot reload (src/reloader.py): seconds between checks of the serving
+    # artifacts, 0 = only on POST /admin/reload
+    MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "5"))
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # required by /admin/* when set; else localhost only
+    COMPILED_CHUNK_SIZE = 4096  # rows walked through the trees at a time
+    FOLD_CHECK_SAMPLES = 100000  # random rows in the raw-model equivalence check
+    FOLD_CHECK_TOLERANCE = 1e-5
+    LATTICE_STUDY_TIME_STEP = 0.1  # StudyTimeWeekly grid spacing in the lattice
+    LATTICE_BUILD_ROWS = 1000000  # rows scored per chunk while building the lattice
+    LATTICE_CHECK_SAMPLES = 100000  # random rows in the interpolation error check
+    
+    # Multi-worker serving (serve.py); 0 = derive from the available CPUs
+    SERVING_WORKERS = int(os.getenv("SERVING_WORKERS", "0"))
+    WORKER_THREADS = int(os.getenv("WORKER_THREADS", "0"))
+    SERVING_BACKLOG = 2048
+    SERVING_ACCESS_LOG = os.getenv("ACCESS_LOG", "0") == "1"
+    SERVING_RESTART_BACKOFF = 1.0  # seconds before restarting a crashed worker, doubled per recent crash
+    SERVING_RESTART_BACKOFF_MAX = 60.0
+    SERVING_MAX_RESTARTS = 10  # crashes within SERVING_RESTART_WINDOW seconds before serve.py gives up
+    SERVING_RESTART_WINDOW = 300
+    
+    # Micro-batching of concurrent /predict requests
+    MICRO_BATCHING_ENABLED = os.getenv("MICRO_BATCHING", "0") == "1"
+    MICRO_BATCH_MAX_SIZE = 64  # rows per model call
+    MICRO_BATCH_MAX_WAIT_MS = 2.0  # how long the first row waits for company
+    
+    # Admission control of /predict, /predict/batch and /predict/binary
+    # (src/admission.py); 0 = accept everything and score on the event loop
+    ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL", "1") == "1"
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "4"))  # requests in progress
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))  # waiting for a slot; beyond, 503
+    ADMISSION_RETRY_AFTER = 1  # seconds, sent with 503
+    # Bodies are read before queueing for a slot; slower uploads get 408
+    UPLOAD_TIMEOUT_MS = float(os.getenv("UPLOAD_TIMEOUT_MS", "10000"))
+    # Deadline when the request has no X-Request-Timeout-Ms header
+    REQUEST_TIMEOUT_MS = float(os.getenv("REQUEST_TIMEOUT_MS", "1000"))
     
     # Streamlit settings
     STREAMLIT_PORT = 8501
@@ -61,6 +178,12 @@ class Config:
     # Cache settings
     CACHE_TTL = 3600  # 1 hour
     
+    # API prediction cache
+    PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE", "1") == "1"
+    PREDICTION_CACHE_SIZE = 100000  # entries kept in the LRU
+    PREDICTION_CACHE_TTL = CACHE_TTL
+    STUDY_TIME_QUANTUM = 0.0  # round StudyTimeWeekly to this step before caching (0 = exact)
+    
     # Feature descriptions for documentation
     FEATURE_DESCRIPTIONS = {
         "StudentID": "A unique identifier assigned to each student (1001 to 3392)",
@@ -98,6 +221,8 @@ class Config:
         'Sports': {'min': 0, 'max': 1},
         'Ethnicity': {'min': 0, 'max': 3}
     }
+    # Features that only take whole numbers; the lattice indexes them directly
+    INTEGER_FEATURES = ['Absences', 'ParentalSupport', 'Tutoring', 'Extracurricular', 'Music', 'Sports', 'Ethnicity']
     
     @classmethod
     def create_directories(cls):
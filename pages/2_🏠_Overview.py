@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from config.config import Config
+from src.dataset import load_dataset
 from utils.styling import load_css
 
 st.set_page_config(page_title="Project Overview", page_icon="📚", layout="wide")
@@ -29,7 +30,7 @@ The target variable, **GradeClass**, categorizes students' grades into distinct
 # Load and cache data
 @st.cache_data
 def load_data():
-    return pd.read_csv(Config.DATA_PATH)
+    return load_dataset()
 
 try:
     df = load_data()
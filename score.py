@@ -0,0 +1,28 @@
+import argparse
+from pathlib import Path
+from config.config import Config
+from src.scoring import score_file
+from utils.logger import setup_logger
+
+logger = setup_logger('score')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of students in bulk")
+    parser.add_argument('input', help="file with the Config.FEATURE_COLUMNS (CSV or .parquet)")
+    parser.add_argument('-o', '--output', default=None,
+                        help="output CSV or .parquet (default: <input>_scored.csv)")
+    parser.add_argument('--mode', choices=['xgboost', 'compiled', 'raw', 'lattice'], default=Config.SERVING_MODE,
+                        help="model backend, as for the API's SERVING_MODE")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="scoring processes (default: available CPUs)")
+    parser.add_argument('--chunk-mb', type=float, default=Config.SCORE_CHUNK_BYTES / 2**20,
+                        help="CSV megabytes per task")
+    return parser.parse_args()
+
+def main(args=None):
+    args = args or parse_args()
+    output = args.output or str(Path(args.input).with_name(Path(args.input).stem + '_scored.csv'))
+    score_file(args.input, output, mode=args.mode, workers=args.workers, chunk_bytes=int(args.chunk_mb * 2**20))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Production API server.
+
+Loads the model once in a parent process, then forks ``SERVING_WORKERS``
+uvicorn workers that share the listening socket and the model memory
+copy-on-write. Each worker's XGBoost thread pool is pinned to
+``WORKER_THREADS`` so workers do not oversubscribe the cores. The model is
+only warmed up in the workers (app startup): OpenMP is not fork-safe, so
+the parent must not have run a multi-threaded prediction before forking.
+Hot reloads (src/reloader.py) happen in each worker separately and give
+every worker a private copy of the new model; restart serve.py to share
+it again. Crashed workers are restarted with exponential backoff, and serve.py
+exits once more than ``SERVING_MAX_RESTARTS`` crashes happen within
+``SERVING_RESTART_WINDOW`` seconds.
+"""
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from config.config import Config
+from utils.logger import setup_logger
+from utils.resources import available_cpus
+
+logger = setup_logger('serve')
+
+
+def plan_workers():
+    """(workers, threads per worker) from Config, defaulting to one worker per CPU.
+
+    The CPU count honours the container's cgroup quota.
+    """
+    cpus = available_cpus()
+    workers = Config.SERVING_WORKERS or cpus
+    threads = Config.WORKER_THREADS or max(1, cpus // workers)
+    return workers, threads
+
+
+def create_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((Config.HOST, Config.PORT))
+    sock.listen(Config.SERVING_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock):
+    import uvicorn
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, access_log=Config.SERVING_ACCESS_LOG)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    workers, threads = plan_workers()
+
+    # Must be set before XGBoost spins up its OpenMP pool
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+
+    # Importing app loads the model without predicting; children inherit it
+    # without reloading and warm it up themselves
+    import app
+    app.models.set_threads(threads)
+    sock = create_socket()
+
+    # Move everything loaded so far out of the GC's reach so collections in
+    # the workers do not touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+    logger.info(f"Serving on {Config.HOST}:{Config.PORT} with {workers} workers x {threads} threads")
+    children = {}
+    shutting_down = False
+    crashes = deque()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app.app, sock)
+            finally:
+                os._exit(0)
+        children[pid] = True
+        logger.info(f"Started worker {pid}")
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(workers):
+        spawn()
+
+    # Supervise: reap exits and replace workers that die unexpectedly
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.pop(pid, None)
+        if shutting_down:
+            continue
+
+        now = time.monotonic()
+        while crashes and crashes[0] < now - Config.SERVING_RESTART_WINDOW:
+            crashes.popleft()
+        crashes.append(now)
+        if len(crashes) > Config.SERVING_MAX_RESTARTS:
+            logger.error(f"Worker {pid} exited with status {status}; {len(crashes)} crashes in "
+                         f"{Config.SERVING_RESTART_WINDOW}s, giving up")
+            shutdown(None, None)
+            continue
+        delay = min(Config.SERVING_RESTART_BACKOFF * 2 ** (len(crashes) - 1), Config.SERVING_RESTART_BACKOFF_MAX)
+        logger.error(f"Worker {pid} exited with status {status}, restarting in {delay:.1f}s")
+        time.sleep(delay)
+        if not shutting_down:
+            spawn()
+
+    sock.close()
+    logger.info("All workers stopped")
+    if len(crashes) > Config.SERVING_MAX_RESTARTS:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
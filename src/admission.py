@@ -0,0 +1,236 @@
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config.config import Config
+
+TIMEOUT_HEADER = b'x-request-timeout-ms'
+
+
+class Overloaded(Exception):
+    """Every slot is busy and the wait queue is full"""
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before its model call started"""
+
+
+class PayloadTooLarge(Exception):
+    """The request body is over the path's size limit"""
+
+
+class AdmissionController:
+    """Bound the requests in progress and the requests waiting to start.
+
+    At most ``max_concurrency`` requests hold a slot; up to ``max_queue``
+    more wait for one in arrival order, and the rest are refused at once
+    so a spike costs a cheap rejection instead of an ever longer queue.
+    Each request has a deadline: it leaves the queue when the deadline
+    passes, and ``run`` refuses to start a model call after it. Model
+    calls run on a pool of ``max_concurrency`` threads, which keeps the
+    event loop free to accept, queue and reject requests while the
+    admitted ones are scored.
+    """
+
+    def __init__(self, max_concurrency=Config.ADMISSION_MAX_CONCURRENCY, max_queue=Config.ADMISSION_MAX_QUEUE,
+                 default_timeout_ms=Config.REQUEST_TIMEOUT_MS):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout_ms / 1000.0
+
+        self._active = 0
+        self._waiters = deque()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='predict')
+
+        self.admitted = 0
+        self.rejected = 0  # queue full
+        self.expired = 0  # deadline passed while queued or before the model call
+
+    def deadline(self, timeout_ms=None, start=None):
+        """Monotonic deadline ``timeout_ms`` (default REQUEST_TIMEOUT_MS) after ``start``"""
+        timeout = self.default_timeout if timeout_ms is None else timeout_ms / 1000.0
+        return (time.monotonic() if start is None else start) + timeout
+
+    def check(self, deadline):
+        if time.monotonic() >= deadline:
+            self.expired += 1
+            raise DeadlineExceeded("Request deadline exceeded before scoring")
+
+    async def acquire(self, deadline):
+        """Take a slot, waiting in line until ``deadline`` if none is free"""
+        self.check(deadline)
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"Server saturated: {self._active} requests in progress, {len(self._waiters)} queued")
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        timer = loop.call_later(max(0.0, deadline - time.monotonic()), self._expire, waiter)
+        try:
+            await waiter
+        except DeadlineExceeded:
+            self.expired += 1
+            raise
+        except asyncio.CancelledError:
+            # release() may have handed us the slot just before the cancellation;
+            # a waiter that expired was never given one
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+            if waiter in self._waiters:
+                # Expired or cancelled: free its place in the queue now
+                self._waiters.remove(waiter)
+        self.admitted += 1
+
+    @staticmethod
+    def _expire(waiter):
+        if not waiter.done():
+            waiter.set_exception(DeadlineExceeded("Request deadline exceeded while queued"))
+
+    def release(self):
+        """Give the slot to the oldest waiter, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    async def run(self, deadline, fn, *args):
+        """``fn(*args)`` on the scoring pool, unless ``deadline`` has passed"""
+        self.check(deadline)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def stats(self):
+        return {
+            'in_progress': self._active,
+            'queued': len(self._waiters),
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'expired': self.expired
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware putting requests to ``paths`` through an AdmissionController.
+
+    ``paths`` maps each path to its maximum body size. The body is read
+    before the request queues for a slot, so slow uploads cannot hold the
+    slots: it gets 413 once over the limit and 408 if it has not arrived
+    within ``upload_timeout_ms``. The handler then receives the buffered
+    body. The deadline is ``X-Request-Timeout-Ms`` (or REQUEST_TIMEOUT_MS)
+    of queueing and handling, from when the body has arrived, and is
+    stored in the request state for the handler's ``run`` calls. Refused
+    requests get 503 with Retry-After when the queue is full and 504 when
+    the deadline passed. The time spent queued goes to ``wait`` (a
+    histogram), and the request's ``start_time`` is reset on admission so
+    the handler's parse stage does not include the upload or the queueing.
+    """
+
+    def __init__(self, app, controller, paths, wait=None, retry_after=Config.ADMISSION_RETRY_AFTER,
+                 upload_timeout_ms=Config.UPLOAD_TIMEOUT_MS):
+        self.app = app
+        self.controller = controller
+        self.paths = dict(paths)
+        self.wait = wait
+        self.retry_after = retry_after
+        self.upload_timeout = upload_timeout_ms / 1000.0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope['headers'])
+        timeout = headers.get(TIMEOUT_HEADER)
+        try:
+            timeout_ms = float(timeout) if timeout is not None else None
+            if timeout_ms is not None and not timeout_ms > 0:
+                raise ValueError
+        except ValueError:
+            await self._respond(send, 400, "X-Request-Timeout-Ms must be a positive number of milliseconds")
+            return
+
+        limit = self.paths[scope['path']]
+        length = headers.get(b'content-length', b'')
+        try:
+            if length.isdigit() and int(length) > limit:
+                raise PayloadTooLarge
+            body = await asyncio.wait_for(self._read_body(receive, limit), self.upload_timeout)
+        except PayloadTooLarge:
+            await self._respond(send, 413, f"Request body exceeds {limit} bytes")
+            return
+        except asyncio.TimeoutError:
+            await self._respond(send, 408, f"Request body not received within {self.upload_timeout * 1000:.0f} ms")
+            return
+        if body is None:
+            # The client went away during the upload
+            return
+
+        start = time.monotonic()
+        deadline = self.controller.deadline(timeout_ms, start)
+
+        try:
+            await self.controller.acquire(deadline)
+        except Overloaded as e:
+            await self._respond(send, 503, str(e), [(b'retry-after', str(self.retry_after).encode())])
+            return
+        except DeadlineExceeded as e:
+            await self._respond(send, 504, str(e))
+            return
+
+        if self.wait is not None:
+            self.wait.observe(time.monotonic() - start)
+        state = scope.setdefault('state', {})
+        state['deadline'] = deadline
+        state['start_time'] = time.perf_counter()
+
+        replayed = False
+
+        async def receive_body():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        try:
+            await self.app(scope, receive_body, send)
+        finally:
+            self.controller.release()
+
+    @staticmethod
+    async def _read_body(receive, limit):
+        """The whole request body, or None if the client disconnected"""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body += message.get('body', b'')
+            if len(body) > limit:
+                raise PayloadTooLarge
+            if not message.get('more_body', False):
+                return bytes(body)
+
+    @staticmethod
+    async def _respond(send, status, detail, headers=()):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                        *headers]
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,104 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.logger import setup_logger
+
+logger = setup_logger('batching')
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into one model call.
+
+    Requests queue their feature row with the predictor to score it and
+    await a future. A collector task takes the first waiting row, gathers
+    more for up to ``max_wait_ms`` or until ``max_batch_size`` rows, and
+    scores the stacked rows of each predictor on a worker thread so the
+    event loop keeps accepting requests meanwhile. Rows are grouped by
+    predictor so a model swapped in while they wait never scores rows of
+    requests that started on the previous one.
+    """
+
+    def __init__(self, max_batch_size=64, max_wait_ms=2.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro_batch')
+
+        self.batches = 0
+        self.rows = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Micro-batching started (max {self.max_batch_size} rows, {self.max_wait * 1000:.1f} ms window)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, row, predictor):
+        """Queue one feature row and wait for its prediction by ``predictor``"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, predictor, future))
+        return await future
+
+    def _drain(self, batch):
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        self._drain(batch)
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            self._drain(batch)
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            groups = {}
+            for row, predictor, future in await self._collect():
+                groups.setdefault(predictor, []).append((row, future))
+            for predictor, batch in groups.items():
+                X = np.array([row for row, _ in batch], dtype=np.float64)
+                try:
+                    predictions = await loop.run_in_executor(self._executor, predictor.predict, X)
+                except Exception as e:
+                    logger.error(f"Error scoring micro-batch of {len(batch)} rows: {str(e)}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                self.batches += 1
+                self.rows += len(batch)
+                for (_, future), prediction in zip(batch, predictions):
+                    if not future.done():
+                        future.set_result(float(prediction))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0
+        }
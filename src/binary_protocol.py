@@ -0,0 +1,157 @@
+"""Columnar binary payloads for /predict/binary and the client helper.
+
+Three content types carry a feature matrix in and predictions out:
+
+- ``application/octet-stream``: the raw row-major matrix in
+  FEATURE_COLUMNS order, float64 or float32 (``X-Dtype`` header). The
+  response is the float32 predictions, NaN for invalid rows. No extra
+  dependencies.
+- ``application/msgpack``: a map of column name to little-endian float64
+  bytes (or a list of numbers). The response is a map with the float32
+  prediction bytes, the invalid row indices and the model version.
+  Needs msgpack.
+- ``application/vnd.apache.arrow.stream``: an Arrow IPC stream with one
+  column per feature. The response holds a float32 ``prediction``
+  column, null for invalid rows. Needs pyarrow.
+
+Decoding wraps the payload buffers with ``np.frombuffer``, so the only
+copy is assembling the columns into the matrix that ``predict`` takes.
+"""
+import numpy as np
+from config.config import Config
+
+RAW = 'application/octet-stream'
+MSGPACK = 'application/msgpack'
+ARROW = 'application/vnd.apache.arrow.stream'
+CONTENT_TYPES = (RAW, MSGPACK, ARROW)
+DTYPES = {'float64': np.dtype('<f8'), 'float32': np.dtype('<f4')}
+
+
+def max_body_bytes(max_rows):
+    """Largest request body that can carry ``max_rows`` rows in any of the formats:
+    8 bytes per value, 9 for msgpack numbers in a list, plus framing"""
+    return max_rows * len(Config.FEATURE_COLUMNS) * 9 + 65536
+
+
+def _import(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        raise ImportError(f"This payload format requires {name} (pip install {name})")
+
+
+def _column_matrix(columns, n_rows):
+    missing = [c for c in Config.FEATURE_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Payload is missing columns: {missing}")
+    X = np.empty((n_rows, len(Config.FEATURE_COLUMNS)), dtype=np.float64)
+    for j, column in enumerate(Config.FEATURE_COLUMNS):
+        values = columns[column]
+        if len(values) != n_rows:
+            raise ValueError(f"Column {column} has {len(values)} values, expected {n_rows}")
+        X[:, j] = values
+    return X
+
+
+def decode_matrix(body, content_type, dtype='float64'):
+    """Feature matrix (rows x FEATURE_COLUMNS) from a request body"""
+    n_features = len(Config.FEATURE_COLUMNS)
+    if content_type == RAW:
+        if dtype not in DTYPES:
+            raise ValueError(f"X-Dtype must be one of {sorted(DTYPES)}")
+        values = np.frombuffer(body, dtype=DTYPES[dtype])
+        if values.size % n_features:
+            raise ValueError(f"Payload of {values.size} values is not a multiple of {n_features} features")
+        return values.reshape(-1, n_features)
+
+    if content_type == MSGPACK:
+        msgpack = _import('msgpack')
+        payload = msgpack.unpackb(body, raw=False)
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a map of column name to values")
+        columns = {
+            name: np.frombuffer(values, dtype='<f8') if isinstance(values, bytes) else np.asarray(values, dtype=np.float64)
+            for name, values in payload.items()
+        }
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        return _column_matrix(columns, n_rows)
+
+    if content_type == ARROW:
+        pa = _import('pyarrow')
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        columns = {
+            name: table.column(name).to_numpy()
+            for name in table.column_names if name in Config.FEATURE_COLUMNS
+        }
+        return _column_matrix(columns, table.num_rows)
+
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+
+def encode_predictions(predictions, invalid_rows, content_type, model_version=None):
+    """Response body for float predictions (NaN at ``invalid_rows``)"""
+    predictions = np.asarray(predictions, dtype='<f4')
+    if content_type == RAW:
+        return predictions.tobytes()
+
+    if content_type == MSGPACK:
+        msgpack = _import('msgpack')
+        return msgpack.packb({
+            'prediction': predictions.tobytes(),
+            'invalid': [int(i) for i in invalid_rows],
+            'model_version': model_version
+        })
+
+    if content_type == ARROW:
+        pa = _import('pyarrow')
+        mask = np.zeros(len(predictions), dtype=bool)
+        mask[np.asarray(invalid_rows, dtype=np.int64)] = True
+        batch = pa.record_batch([pa.array(predictions, mask=mask)], names=['prediction'])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+
+def encode_matrix(X, content_type, dtype='float64'):
+    """Request body for a feature matrix in FEATURE_COLUMNS order (client side)"""
+    X = np.asarray(X)
+    if content_type == RAW:
+        return np.ascontiguousarray(X, dtype=DTYPES[dtype]).tobytes()
+
+    if content_type == MSGPACK:
+        msgpack = _import('msgpack')
+        return msgpack.packb({
+            column: np.ascontiguousarray(X[:, j], dtype='<f8').tobytes()
+            for j, column in enumerate(Config.FEATURE_COLUMNS)
+        })
+
+    if content_type == ARROW:
+        pa = _import('pyarrow')
+        batch = pa.record_batch([pa.array(np.ascontiguousarray(X[:, j])) for j in range(X.shape[1])],
+                                names=list(Config.FEATURE_COLUMNS))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+
+def decode_predictions(body, content_type):
+    """float32 predictions (NaN for invalid rows) from a response body (client side)"""
+    if content_type == RAW:
+        return np.frombuffer(body, dtype='<f4')
+
+    if content_type == MSGPACK:
+        msgpack = _import('msgpack')
+        return np.frombuffer(msgpack.unpackb(body, raw=False)['prediction'], dtype='<f4')
+
+    if content_type == ARROW:
+        pa = _import('pyarrow')
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        return table.column('prediction').to_numpy(zero_copy_only=False).astype(np.float32, copy=False)
+
+    raise ValueError(f"Unsupported content type: {content_type}")
@@ -0,0 +1,63 @@
+import http.client
+import json
+from urllib.parse import urlparse
+import numpy as np
+from config.config import Config
+from src.binary_protocol import RAW, decode_predictions, encode_matrix
+
+
+class PredictionClient:
+    """Keep-alive HTTP client for the prediction API.
+
+    ``predict_matrix`` sends a NumPy feature matrix (FEATURE_COLUMNS
+    order) to /predict/binary in one of the src.binary_protocol formats
+    and returns float32 predictions, NaN for rows that failed validation.
+    """
+
+    def __init__(self, base_url=f"http://localhost:{Config.PORT}", timeout=30):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._connection = None
+
+    def _request(self, path, body, headers):
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._connection.request('POST', path, body, headers)
+                response = self._connection.getresponse()
+                content = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed the idle keep-alive connection; retry once on a new one
+                self.close()
+                if attempt:
+                    raise
+        if response.status >= 400:
+            raise RuntimeError(f"{path} returned {response.status}: {content.decode(errors='replace')}")
+        return response, content
+
+    def predict(self, features):
+        """Prediction for one dict of FEATURE_COLUMNS values"""
+        _, content = self._request('/predict', json.dumps(features), {'Content-Type': 'application/json'})
+        return json.loads(content)['prediction']
+
+    def predict_batch(self, rows):
+        """Predictions (None for invalid rows) and errors for a list of feature dicts"""
+        _, content = self._request('/predict/batch', json.dumps({'instances': rows}),
+                                   {'Content-Type': 'application/json'})
+        result = json.loads(content)
+        return result['predictions'], result['errors']
+
+    def predict_matrix(self, X, content_type=RAW, dtype='float64'):
+        """float32 predictions for a feature matrix sent as a binary payload"""
+        body = encode_matrix(np.asarray(X), content_type, dtype)
+        response, content = self._request('/predict/binary', body, {'Content-Type': content_type, 'X-Dtype': dtype})
+        return decode_predictions(content, response.getheader('Content-Type', content_type).split(';')[0])
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
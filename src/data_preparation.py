@@ -4,30 +4,52 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import MinMaxScaler
 import pickle
 from config.config import Config
+from src.dataset import load_dataset
+from src.validation import validate_matrix, violation_messages
 from utils.logger import setup_logger
 
 logger = setup_logger('data_preparation')
 
+def split_data(df):
+    """Split into (X_train, X_test, y_train, y_test) DataFrames.
+
+    Rows outside Config.DATA_VALIDATION are reported, and only dropped
+    with TRAIN_DROP_INVALID_ROWS=1.
+    """
+    # Split features and target
+    X = df[Config.FEATURE_COLUMNS]
+    y = df[Config.TARGET_COLUMN]
+    
+    # Report (and optionally drop) rows outside Config.DATA_VALIDATION
+    invalid = validate_matrix(X.to_numpy())
+    valid_rows = ~invalid.any(axis=1)
+    if not valid_rows.all():
+        messages = violation_messages(X.to_numpy(), invalid)
+        example = f"e.g. row {next(iter(messages))}: {next(iter(messages.values()))}"
+        if Config.TRAIN_DROP_INVALID_ROWS:
+            logger.warning(f"Dropping {len(messages)} invalid rows, {example}")
+            X, y = X[valid_rows], y[valid_rows]
+        else:
+            logger.warning(f"Training on {len(messages)} rows outside DATA_VALIDATION, {example} "
+                           f"(TRAIN_DROP_INVALID_ROWS=1 drops them)")
+    
+    # Train test split
+    return train_test_split(
+        X, y, 
+        test_size=Config.TEST_SIZE,
+        random_state=Config.RANDOM_STATE
+    )
+
 def load_and_prepare_data():
     """Load and prepare data for modeling"""
     try:
         # Load data
-        logger.info("Loading data from CSV...")
-        df = pd.read_csv(Config.DATA_PATH)
-        
-        # Split features and target
-        X = df[Config.FEATURE_COLUMNS]
-        y = df[Config.TARGET_COLUMN]
+        logger.info("Loading data...")
+        df = load_dataset(Config.FEATURE_COLUMNS + [Config.TARGET_COLUMN])
+        X_train, X_test, y_train, y_test = split_data(df)
         
         # Save feature names
-        feature_names = X.columns.tolist()
-
-        # Train test split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, 
-            test_size=Config.TEST_SIZE,
-            random_state=Config.RANDOM_STATE
-        )
+        feature_names = X_train.columns.tolist()
         
         # Scale features
         scaler = MinMaxScaler()
@@ -43,4 +65,4 @@ def load_and_prepare_data():
         
     except Exception as e:
         logger.error(f"Error in data preparation: {str(e)}")
-        raise
\ No newline at end of file
+        raise
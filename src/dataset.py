@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from numpy.lib.format import read_array_header_2_0, read_magic, write_array_header_2_0
+from config.config import Config
+from utils.logger import setup_logger
+
+logger = setup_logger('dataset')
+
+MANIFEST = 'manifest.json'
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def source_hash(path):
+    """BLAKE2 digest of the file contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _compact_dtype(dtype, low, high):
+    """Smallest integer dtype holding [low, high]; other dtypes are kept"""
+    if dtype == object:
+        raise ValueError("Only numeric columns can be cached")
+    if not np.issubdtype(dtype, np.integer):
+        return np.dtype(dtype)
+    for candidate in INT_DTYPES:
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            return np.dtype(candidate)
+    return np.dtype(np.int64)
+
+
+def _scan(path):
+    """Row count and compact dtype per column, from one chunked pass over the CSV"""
+    n_rows, dtypes, lows, highs = 0, {}, {}, {}
+    for chunk in pd.read_csv(path, chunksize=Config.DATASET_CHUNK_ROWS):
+        n_rows += len(chunk)
+        for column in chunk.columns:
+            values = chunk[column]
+            # A column that is integer in one chunk and float in another is float
+            dtypes[column] = np.result_type(dtypes.get(column, values.dtype), values.dtype)
+            if len(values):
+                lows[column] = min(lows.get(column, values.min()), values.min())
+                highs[column] = max(highs.get(column, values.max()), values.max())
+    return n_rows, {c: _compact_dtype(dtype, lows.get(c, 0), highs.get(c, 0)) for c, dtype in dtypes.items()}
+
+
+def build_cache(path=Config.DATA_PATH, cache_dir=Config.DATASET_CACHE_DIR, digest=None):
+    """Convert the CSV into one .npy file per column with compact dtypes.
+
+    The columns go in ``cache_dir/<content hash>/``; caches of older
+    versions of the file are removed.
+    """
+    try:
+        digest = digest or source_hash(path)
+        logger.info(f"Building dataset cache for {path} ({digest})")
+        n_rows, dtypes = _scan(path)
+
+        cache_dir = os.fspath(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=cache_dir, prefix='.build-')
+        # Append chunks to plain files (not memmaps) so written pages are not
+        # held in this process's memory
+        files = {}
+        try:
+            for column, dtype in dtypes.items():
+                f = files[column] = open(os.path.join(staging, f'{column}.npy'), 'wb')
+                write_array_header_2_0(f, {'descr': dtype.str, 'fortran_order': False, 'shape': (n_rows,)})
+            for chunk in pd.read_csv(path, chunksize=Config.DATASET_CHUNK_ROWS):
+                for column, f in files.items():
+                    f.write(chunk[column].to_numpy().astype(dtypes[column]).tobytes())
+        finally:
+            for f in files.values():
+                f.close()
+
+        stat = os.stat(path)
+        with open(os.path.join(staging, MANIFEST), 'w') as f:
+            json.dump({
+                'source': os.fspath(path),
+                'hash': digest,
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'rows': n_rows,
+                'columns': {c: dtype.str for c, dtype in dtypes.items()}
+            }, f, indent=4)
+
+        target = os.path.join(cache_dir, digest)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+        for name, manifest in _manifests(cache_dir):
+            if name != digest and manifest['source'] == os.fspath(path):
+                shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        return target
+
+    except Exception as e:
+        logger.error(f"Error building dataset cache: {str(e)}")
+        raise
+
+
+def _manifests(cache_dir):
+    """(directory name, manifest) of every finished cache in ``cache_dir``"""
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        manifest_path = os.path.join(cache_dir, name, MANIFEST)
+        if not name.startswith('.') and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                yield name, json.load(f)
+
+
+def _cache_location(path, cache_dir):
+    """Directory of an up-to-date cache for ``path``, building it if needed.
+
+    The content hash is only recomputed when the file's size or mtime
+    differs from what the existing cache recorded.
+    """
+    stat = os.stat(path)
+    cache_dir = os.fspath(cache_dir)
+    for name, manifest in _manifests(cache_dir):
+        if manifest['source'] != os.fspath(path):
+            continue
+        if manifest['size'] == stat.st_size and manifest['mtime_ns'] == stat.st_mtime_ns:
+            return os.path.join(cache_dir, name)
+        digest = source_hash(path)
+        if digest == manifest['hash']:
+            # Same contents, new timestamp: record it so the next load skips hashing
+            manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            with open(os.path.join(cache_dir, name, MANIFEST), 'w') as f:
+                json.dump(manifest, f, indent=4)
+            return os.path.join(cache_dir, name)
+        return build_cache(path, cache_dir, digest)
+    return build_cache(path, cache_dir)
+
+
+def dataset_hash(path=Config.DATA_PATH, cache_dir=Config.DATASET_CACHE_DIR):
+    """Content hash of the data file (from the cache manifest, rebuilt if stale)"""
+    with open(os.path.join(_cache_location(path, cache_dir), MANIFEST)) as f:
+        return json.load(f)['hash']
+
+
+def load_columns(columns=None, path=Config.DATA_PATH, cache_dir=Config.DATASET_CACHE_DIR, mmap=True):
+    """Dict of column name -> array (memory-mapped by default) from the cache"""
+    location = _cache_location(path, cache_dir)
+    with open(os.path.join(location, MANIFEST)) as f:
+        available = list(json.load(f)['columns'])
+    columns = available if columns is None else list(columns)
+    missing = [c for c in columns if c not in available]
+    if missing:
+        raise KeyError(f"Columns not in {path}: {missing}")
+    return {c: np.load(os.path.join(location, f'{c}.npy'), mmap_mode='r' if mmap else None) for c in columns}
+
+
+def load_dataset(columns=None, path=Config.DATA_PATH, cache_dir=Config.DATASET_CACHE_DIR):
+    """The dataset as a DataFrame with only ``columns``, read from the columnar cache"""
+    return pd.DataFrame(load_columns(columns, path, cache_dir, mmap=False))
+
+
+def remove_cache(path=Config.DATA_PATH, cache_dir=Config.DATASET_CACHE_DIR):
+    """Delete the cached columns of ``path``"""
+    for name, manifest in list(_manifests(os.fspath(cache_dir))):
+        if manifest['source'] == os.fspath(path):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def iter_chunks(columns=None, chunk_rows=Config.DATASET_CHUNK_ROWS, path=Config.DATA_PATH,
+                cache_dir=Config.DATASET_CACHE_DIR):
+    """Yield the dataset as DataFrames of at most ``chunk_rows`` rows.
+
+    Reads each column file sequentially, without memory-mapping it, so
+    memory use depends on ``chunk_rows`` and not on the size of the dataset.
+    """
+    location = _cache_location(path, cache_dir)
+    with open(os.path.join(location, MANIFEST)) as f:
+        manifest = json.load(f)
+    columns = list(manifest['columns']) if columns is None else list(columns)
+    files = {}
+    try:
+        for column in columns:
+            f = files[column] = open(os.path.join(location, f'{column}.npy'), 'rb')
+            read_magic(f)
+            read_array_header_2_0(f)
+        for start in range(0, manifest['rows'], chunk_rows):
+            n = min(chunk_rows, manifest['rows'] - start)
+            yield pd.DataFrame(
+                {c: np.fromfile(f, dtype=manifest['columns'][c], count=n) for c, f in files.items()},
+                index=pd.RangeIndex(start, start + n)
+            )
+    finally:
+        for f in files.values():
+            f.close()
+
+
+if __name__ == "__main__":
+    build_cache()
@@ -6,6 +6,14 @@ from utils.logger import setup_logger
 
 logger = setup_logger('evaluation')
 
+def save_evaluation(metrics, feature_importance):
+    """Write the metrics and feature importance read by the Analytics page"""
+    with open(Config.METRICS_PATH, 'w') as f:
+        json.dump(metrics, f, indent=4)
+    
+    with open(Config.FEATURE_IMPORTANCE_PATH, 'w') as f:
+        json.dump(feature_importance, f, indent=4)
+
 def evaluate_model(model, X_train, X_test, y_train, y_test, feature_names):
     """Evaluate model performance"""
     try:
@@ -29,14 +37,7 @@ def evaluate_model(model, X_train, X_test, y_train, y_test, feature_names):
         importance_values = [float(x) for x in xgb_model.feature_importances_]
         feature_importance = dict(zip(feature_names, importance_values))
         
-        # Save metrics
-        with open(Config.METRICS_PATH, 'w') as f:
-            json.dump(metrics, f, indent=4)
-        
-        # Save feature importance
-        with open(Config.FEATURE_IMPORTANCE_PATH, 'w') as f:
-            json.dump(feature_importance, f, indent=4)
-        
+        save_evaluation(metrics, feature_importance)
         logger.info("Model evaluation completed and saved")
         return metrics, feature_importance
         
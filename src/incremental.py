@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import pickle
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from config.config import Config
+from src.data_preparation import split_data
+from src.dataset import iter_chunks, load_dataset
+from src.evaluation import evaluate_model
+from src.model import set_booster
+from src.streaming import split_hash
+from src.validation import validate_matrix
+from utils.logger import setup_logger
+
+logger = setup_logger('incremental')
+
+TRAINING_COLUMNS = Config.FEATURE_COLUMNS + [Config.TARGET_COLUMN]
+
+
+def rows_digest(n_rows=None):
+    """Hash of the first ``n_rows`` rows of the training columns (all rows if None)"""
+    digest = hashlib.blake2b(digest_size=16)
+    seen = 0
+    for chunk in iter_chunks(TRAINING_COLUMNS):
+        if n_rows is not None:
+            chunk = chunk.iloc[:n_rows - seen]
+        for column in TRAINING_COLUMNS:
+            digest.update(chunk[column].to_numpy(np.float64).tobytes())
+        seen += len(chunk)
+        if n_rows is not None and seen >= n_rows:
+            break
+    return digest.hexdigest(), seen
+
+
+def save_training_state(mode, model, metrics, split='random'):
+    """Record what the saved model was trained on, for the next incremental run"""
+    digest, n_rows = rows_digest()
+    regressor = model.named_steps['regressor']
+    state = {
+        'mode': mode,
+        'split': split,
+        'rows': n_rows,
+        'rows_digest': digest,
+        'boosted_rounds': regressor.get_booster().num_boosted_rounds(),
+        'params': {k: v for k, v in regressor.get_xgb_params().items() if v is not None},
+        'metrics': metrics,
+        'trained_at': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(Config.TRAINING_STATE_PATH, 'w') as f:
+        json.dump(state, f, indent=4)
+    return state
+
+
+def load_training_state():
+    if not os.path.exists(Config.TRAINING_STATE_PATH):
+        return None
+    with open(Config.TRAINING_STATE_PATH) as f:
+        return json.load(f)
+
+
+def append_rows(csv_path):
+    """Append the rows of ``csv_path`` (same columns as the dataset) to Config.DATA_PATH"""
+    new_rows = pd.read_csv(csv_path)
+    columns = pd.read_csv(Config.DATA_PATH, nrows=0).columns.tolist()
+    missing = set(columns) - set(new_rows.columns)
+    if missing:
+        raise ValueError(f"{csv_path} is missing columns: {sorted(missing)}")
+    new_rows[columns].to_csv(Config.DATA_PATH, mode='a', header=False, index=False)
+    logger.info(f"Appended {len(new_rows)} rows from {csv_path} to {Config.DATA_PATH}")
+    return len(new_rows)
+
+
+def population_stability(expected, actual, bins=10):
+    """Population stability index of ``actual`` against ``expected``.
+
+    Bins split halfway between the quantiles of ``expected``, so discrete
+    features get one bin per value.
+    """
+    cuts = np.unique(np.quantile(expected, np.linspace(0, 1, bins + 1)))
+    edges = np.concatenate([[-np.inf], (cuts[:-1] + cuts[1:]) / 2, [np.inf]])
+    expected_share = np.clip(np.histogram(expected, edges)[0] / len(expected), 1e-4, None)
+    actual_share = np.clip(np.histogram(actual, edges)[0] / len(actual), 1e-4, None)
+    return float(np.sum((actual_share - expected_share) * np.log(actual_share / expected_share)))
+
+
+def threshold_breaches(y_true, y_pred):
+    """Config.METRIC_THRESHOLDS that the predictions fail, on the evaluate_model scales"""
+    scores = {
+        'r2_score': r2_score(y_true, y_pred),
+        'mae': mean_absolute_error(np.exp(y_true), np.exp(y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(np.exp(y_true), np.exp(y_pred))))
+    }
+    breaches = []
+    for name, score in scores.items():
+        limit = Config.METRIC_THRESHOLDS[name]
+        failed = score < limit if name == 'r2_score' else score > limit
+        if failed:
+            breaches.append(f"{name}={score:.4f} (threshold {limit})")
+    return breaches
+
+
+def update_booster(regressor, X, y):
+    """Continue boosting, or refresh the leaves of the existing trees, on (X, y)"""
+    booster = regressor.get_booster()
+    params = {k: v for k, v in regressor.get_xgb_params().items() if v is not None}
+    dtrain = xgb.DMatrix(X, label=y)
+    if Config.INCREMENTAL_MODE == 'refresh':
+        params.update(process_type='update', updater='refresh', refresh_leaf=True)
+        return xgb.train(params, dtrain, num_boost_round=booster.num_boosted_rounds(), xgb_model=booster)
+    return xgb.train(params, dtrain, num_boost_round=Config.INCREMENTAL_ROUNDS, xgb_model=booster)
+
+
+def train_incremental():
+    """Update the saved model with rows appended to the dataset since it was trained.
+
+    Keeps the saved scaler and hyperparameters and either adds
+    ``Config.INCREMENTAL_ROUNDS`` trees or refreshes the leaf values
+    (``Config.INCREMENTAL_MODE``), training on the old training rows plus
+    the new rows assigned to training by ``split_hash``. Fewer than
+    ``Config.DRIFT_MIN_ROWS`` new rows are too few for the drift and
+    threshold checks to mean anything, so they are left for a later run.
+    Returns ``(model, metrics, updated)`` (``updated`` False when the
+    saved model is kept as is), or None when a full search is needed: no usable
+    previous state, rewritten old rows, feature drift above
+    ``Config.DRIFT_PSI_THRESHOLD``, or ``Config.METRIC_THRESHOLDS`` failed
+    on the new rows or after the update.
+    """
+    try:
+        state = load_training_state()
+        if state is None or not os.path.exists(Config.MODEL_PATH) or not os.path.exists(Config.SCALER_PATH):
+            logger.info("No previous training state; running a full search")
+            return None
+        if state['split'] != 'random':
+            logger.info(f"Previous model used the {state['split']} split; running a full search")
+            return None
+        if rows_digest(state['rows']) != (state['rows_digest'], state['rows']):
+            logger.info("Rows the model was trained on have changed; running a full search")
+            return None
+
+        with open(Config.MODEL_PATH, 'rb') as f:
+            model = pickle.load(f)
+        with open(Config.SCALER_PATH, 'rb') as f:
+            scaler = pickle.load(f)
+
+        df = load_dataset(TRAINING_COLUMNS + [Config.SPLIT_KEY_COLUMN])
+        old, new = df.iloc[:state['rows']], df.iloc[state['rows']:]
+        new = new[~validate_matrix(new[Config.FEATURE_COLUMNS].to_numpy()).any(axis=1)]
+        if len(new) < Config.DRIFT_MIN_ROWS:
+            logger.info(f"{len(new)} new rows since the last training run, fewer than {Config.DRIFT_MIN_ROWS}; "
+                        f"keeping the current model until more arrive")
+            return model, state['metrics'], False
+        logger.info(f"{len(new)} new rows since the last training run")
+
+        # The old rows split exactly as when the model was trained; new rows by key hash
+        X_train, X_test, y_train, y_test = split_data(old[TRAINING_COLUMNS])
+        new_test = split_hash(new[Config.SPLIT_KEY_COLUMN].to_numpy()) < Config.TEST_SIZE
+        X_new, y_new = new[Config.FEATURE_COLUMNS], new[Config.TARGET_COLUMN]
+
+        drift = {c: population_stability(X_train[c].to_numpy(), X_new[c].to_numpy()) for c in Config.FEATURE_COLUMNS}
+        drifted = {c: round(psi, 4) for c, psi in drift.items() if psi > Config.DRIFT_PSI_THRESHOLD}
+        if drifted:
+            logger.info(f"Feature drift above PSI {Config.DRIFT_PSI_THRESHOLD}: {drifted}; running a full search")
+            return None
+
+        breaches = threshold_breaches(y_new.to_numpy(), model.predict(scaler.transform(X_new)))
+        if breaches:
+            logger.info(f"Current model fails on the new rows: {', '.join(breaches)}; running a full search")
+            return None
+
+        X_train = pd.concat([X_train, X_new[~new_test]])
+        y_train = pd.concat([y_train, y_new[~new_test]])
+        X_test = pd.concat([X_test, X_new[new_test]])
+        y_test = pd.concat([y_test, y_new[new_test]])
+        X_train_scaled, X_test_scaled = scaler.transform(X_train), scaler.transform(X_test)
+
+        regressor = model.named_steps['regressor']
+        rounds_before = regressor.get_booster().num_boosted_rounds()
+        set_booster(regressor, update_booster(regressor, X_train_scaled, y_train.to_numpy()))
+        regressor.set_params(n_estimators=regressor.get_booster().num_boosted_rounds())
+        logger.info(f"Updated model ({Config.INCREMENTAL_MODE}): {rounds_before} -> {regressor.n_estimators} trees")
+
+        breaches = threshold_breaches(y_test.to_numpy(), model.predict(X_test_scaled))
+        if breaches:
+            logger.info(f"Updated model fails on the test rows: {', '.join(breaches)}; running a full search")
+            return None
+
+        metrics, _ = evaluate_model(model, X_train_scaled, X_test_scaled, y_train, y_test, Config.FEATURE_COLUMNS)
+        with open(Config.MODEL_PATH, 'wb') as f:
+            pickle.dump(model, f)
+        return model, metrics, True
+
+    except Exception as e:
+        logger.error(f"Error in incremental training: {str(e)}")
+        raise
@@ -0,0 +1,199 @@
+import hashlib
+import pickle
+import threading
+import numpy as np
+from config.config import Config
+
+
+class AffineScaler:
+    """MinMaxScaler.transform precomputed as X * scale + offset"""
+
+    def __init__(self, scale, offset):
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+
+    @classmethod
+    def from_scaler(cls, scaler):
+        """Build from a fitted sklearn MinMaxScaler"""
+        return cls(scaler.scale_, scaler.min_)
+
+    def transform(self, X, out=None):
+        """Scale X in float64 (as sklearn does) and write into out"""
+        scaled = np.multiply(X, self.scale)
+        return np.add(scaled, self.offset, out=out)
+
+
+class Predictor:
+    """Scaled inference without pandas or sklearn overhead.
+
+    Subclasses implement ``_predict_scaled`` for a float32 matrix that has
+    already been through the scaler. Models that take raw features pass
+    ``scaler=None`` and receive the float64 input unchanged.
+    """
+
+    def __init__(self, scaler=None, columns=None):
+        self.columns = list(columns or Config.FEATURE_COLUMNS)
+        if scaler is not None and not isinstance(scaler, AffineScaler):
+            scaler = AffineScaler.from_scaler(scaler)
+        self.scaler = scaler
+
+        # Per-thread preallocated rows for the single-prediction path
+        self._local = threading.local()
+
+    def _row_buffers(self):
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            n_features = len(self.columns)
+            buffers = (
+                np.empty((1, n_features), dtype=np.float64),
+                np.empty((1, n_features), dtype=np.float32)
+            )
+            self._local.buffers = buffers
+        return buffers
+
+    def _predict_scaled(self, X_scaled):
+        raise NotImplementedError
+
+    def set_threads(self, n_threads):
+        """Limit the threads one prediction may use (no-op for NumPy backends)"""
+
+    def predict(self, X):
+        """Predict for a raw feature matrix in FEATURE_COLUMNS order"""
+        X = np.asarray(X, dtype=np.float64)
+        if self.scaler is None:
+            return self._predict_scaled(X)
+        X_scaled = np.empty(X.shape, dtype=np.float32)
+        self.scaler.transform(X, out=X_scaled)
+        return self._predict_scaled(X_scaled)
+
+    def predict_one(self, features):
+        """Predict for a single validated FeatureInput"""
+        raw, scaled = self._row_buffers()
+        for i, column in enumerate(self.columns):
+            raw[0, i] = getattr(features, column)
+        if self.scaler is None:
+            return float(self._predict_scaled(raw)[0])
+        self.scaler.transform(raw, out=scaled)
+        return float(self._predict_scaled(scaled)[0])
+
+
+class XGBoostPredictor(Predictor):
+    """Predict with the booster of the pickled sklearn Pipeline, or a bare Booster"""
+
+    def __init__(self, model, scaler, columns=None):
+        super().__init__(scaler, columns)
+        self.regressor = model.named_steps['regressor'] if hasattr(model, 'named_steps') else model
+        self.booster = self.regressor.get_booster() if hasattr(self.regressor, 'get_booster') else self.regressor
+
+        best_iteration = getattr(self.booster, 'best_iteration', None)
+        self.iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+
+    def set_threads(self, n_threads):
+        self.booster.set_param({'nthread': n_threads})
+
+    def _predict_scaled(self, X_scaled):
+        return self.booster.inplace_predict(X_scaled, iteration_range=self.iteration_range)
+
+
+class CompiledPredictor(Predictor):
+    """Predict with the NumPy tree evaluator from src.tree_compiler"""
+
+    def __init__(self, ensemble, scaler=None, columns=None):
+        super().__init__(scaler, columns)
+        self.ensemble = ensemble
+
+    def _predict_scaled(self, X_scaled):
+        return self.ensemble.predict(X_scaled)
+
+
+def uses_bundle(mode=None):
+    """Whether a serving mode loads the model bundle (src.model_bundle) instead of pickles"""
+    mode = mode or Config.SERVING_MODE
+    return (mode in ('xgboost', 'compiled') and Config.MODEL_FORMAT == 'bundle'
+            and (Config.MODEL_BUNDLE_DIR / 'CURRENT').exists())
+
+
+def artifact_paths(mode=None):
+    """Artifacts a serving mode loads, in the order training writes them.
+
+    The last one is the commit point: train.py writes the scaler in the
+    prepare stage, minutes before the model, and the lattice table before
+    its axes, so a new version is only complete once the last path changes.
+    """
+    mode = mode or Config.SERVING_MODE
+    if uses_bundle(mode):
+        # Each bundle version is immutable; the pointer changes with the model
+        return [Config.MODEL_BUNDLE_DIR / 'CURRENT']
+    if mode == 'lattice':
+        return [Config.LATTICE_PATH, Config.LATTICE_META_PATH]
+    if mode == 'raw':
+        return [Config.RAW_MODEL_PATH]
+    if mode == 'compiled':
+        return [Config.SCALER_PATH, Config.COMPILED_MODEL_PATH]
+    return [Config.SCALER_PATH, Config.MODEL_PATH]
+
+
+def artifact_version(mode=None):
+    """Modification time and size of the serving artifacts"""
+    version = []
+    for path in artifact_paths(mode):
+        try:
+            stat = path.stat()
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+
+def model_version(mode=None):
+    """Short id of the model a serving mode would load now: the bundle
+    version, or a hash of the artifacts' mtimes and sizes"""
+    if uses_bundle(mode):
+        from src.model_bundle import current_version
+        return current_version(Config.MODEL_BUNDLE_DIR)
+    return hashlib.blake2b(repr(artifact_version(mode)).encode(), digest_size=8).hexdigest()
+
+
+def load_predictor(mode=None):
+    """Load artifacts for a serving mode and return its predictor"""
+    mode = mode or Config.SERVING_MODE
+    if mode == 'lattice':
+        from src.lattice import LatticePredictor, PredictionLattice, build_lattice
+        if Config.LATTICE_PATH.exists() and Config.LATTICE_META_PATH.exists():
+            lattice = PredictionLattice.load()
+        else:
+            lattice = build_lattice()
+        return LatticePredictor(lattice)
+
+    if mode == 'raw':
+        from src.tree_compiler import CompiledEnsemble, export_raw_model
+        if Config.RAW_MODEL_PATH.exists():
+            ensemble = CompiledEnsemble.load(Config.RAW_MODEL_PATH)
+        else:
+            ensemble = export_raw_model()
+        return CompiledPredictor(ensemble)
+
+    if uses_bundle(mode):
+        from src.model_bundle import ModelBundle
+        bundle = ModelBundle.open()
+        if mode == 'xgboost':
+            return XGBoostPredictor(bundle.booster, bundle.scaler, bundle.columns)
+        return CompiledPredictor(bundle.ensemble, bundle.scaler, bundle.columns)
+
+    with open(Config.SCALER_PATH, 'rb') as f:
+        scaler = pickle.load(f)
+
+    if mode == 'xgboost':
+        with open(Config.MODEL_PATH, 'rb') as f:
+            model = pickle.load(f)
+        return XGBoostPredictor(model, scaler)
+
+    if mode == 'compiled':
+        from src.tree_compiler import CompiledEnsemble, compile_model
+        if Config.COMPILED_MODEL_PATH.exists():
+            ensemble = CompiledEnsemble.load(Config.COMPILED_MODEL_PATH)
+        else:
+            ensemble = compile_model()
+        return CompiledPredictor(ensemble, scaler)
+
+    raise ValueError(f"Unknown serving mode: {mode}")
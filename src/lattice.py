@@ -0,0 +1,163 @@
+import json
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+from config.config import Config
+from src.inference import Predictor, load_predictor
+from src.validation import feature_bounds
+from utils.logger import setup_logger
+
+logger = setup_logger('lattice')
+
+STUDY_FEATURE = 'StudyTimeWeekly'
+
+
+class PredictionLattice:
+    """Dense table of predictions over the whole discrete input space.
+
+    ``values`` has one row per combination of the integer features (in
+    FEATURE_COLUMNS order, C-ordered) and one column per point of the
+    StudyTimeWeekly grid.
+    """
+
+    def __init__(self, values, discrete_features, discrete_min, discrete_size,
+                 study_min, study_step):
+        self.values = values
+        self.discrete_features = list(discrete_features)
+        self.discrete_min = np.asarray(discrete_min, dtype=np.int64)
+        self.discrete_size = np.asarray(discrete_size, dtype=np.int64)
+        self.study_min = float(study_min)
+        self.study_step = float(study_step)
+
+    @classmethod
+    def layout(cls):
+        """Axes of the lattice derived from Config.DATA_VALIDATION"""
+        discrete = [c for c in Config.FEATURE_COLUMNS if c != STUDY_FEATURE]
+        discrete_min = [int(Config.get_feature_range(c)['min']) for c in discrete]
+        discrete_size = [int(Config.get_feature_range(c)['max']) - low + 1 for c, low in zip(discrete, discrete_min)]
+        study = Config.get_feature_range(STUDY_FEATURE)
+        n_study = int(round((study['max'] - study['min']) / Config.LATTICE_STUDY_TIME_STEP)) + 1
+        study_grid = np.linspace(study['min'], study['max'], n_study)
+        return discrete, discrete_min, discrete_size, study_grid
+
+    @classmethod
+    def load(cls, path=Config.LATTICE_PATH, meta_path=Config.LATTICE_META_PATH):
+        """Memory-map a lattice written by build_lattice"""
+        with open(meta_path) as f:
+            meta = json.load(f)
+        values = np.load(path, mmap_mode='r')
+        return cls(values, meta['discrete_features'], meta['discrete_min'], meta['discrete_size'],
+                   meta['study_min'], meta['study_step'])
+
+    def lookup(self, X):
+        """Predict for raw features, interpolating linearly along StudyTimeWeekly"""
+        X = np.asarray(X, dtype=np.float64)
+        discrete_idx = [Config.FEATURE_COLUMNS.index(c) for c in self.discrete_features]
+        coords = X[:, discrete_idx].astype(np.int64) - self.discrete_min
+        rows = np.ravel_multi_index(coords.T, self.discrete_size)
+
+        position = (X[:, Config.FEATURE_COLUMNS.index(STUDY_FEATURE)] - self.study_min) / self.study_step
+        lower = np.clip(np.floor(position).astype(np.int64), 0, self.values.shape[1] - 2)
+        weight = (position - lower).astype(np.float32)
+        low_values = self.values[rows, lower]
+        high_values = self.values[rows, lower + 1]
+        return low_values + weight * (high_values - low_values)
+
+
+class LatticePredictor(Predictor):
+    """Answer predictions from the precomputed lattice without the model"""
+
+    def __init__(self, lattice, columns=None):
+        super().__init__(None, columns)
+        self.lattice = lattice
+
+    def _predict_scaled(self, X):
+        return self.lattice.lookup(X)
+
+
+def _grid_rows(discrete_size, discrete_min, combos, study_values):
+    """Raw feature matrix for the given discrete combinations x study values"""
+    discrete = np.stack(np.unravel_index(combos, discrete_size), axis=1) + np.asarray(discrete_min)
+    n_study = len(study_values)
+    X = np.empty((len(combos) * n_study, len(Config.FEATURE_COLUMNS)), dtype=np.float64)
+    study_idx = Config.FEATURE_COLUMNS.index(STUDY_FEATURE)
+    discrete_idx = [i for i in range(len(Config.FEATURE_COLUMNS)) if i != study_idx]
+    X[:, discrete_idx] = np.repeat(discrete, n_study, axis=0)
+    X[:, study_idx] = np.tile(study_values, len(combos))
+    return X
+
+
+def build_lattice(predictor=None, path=Config.LATTICE_PATH, meta_path=Config.LATTICE_META_PATH):
+    """Score the full input lattice with the real model and save it memory-mappable.
+
+    Also reports the maximum interpolation error against the model at the
+    midpoints of the StudyTimeWeekly grid and at random in-range inputs.
+    Both files are written next to their targets and moved into place
+    (table first, axes second), so a server that has the old table
+    memory-mapped keeps reading the old, intact file.
+    """
+    tmp_path, tmp_meta_path = f'{path}.tmp', f'{meta_path}.tmp'
+    try:
+        if predictor is None:
+            predictor = load_predictor('xgboost')
+        discrete, discrete_min, discrete_size, study_grid = PredictionLattice.layout()
+        n_combos = int(np.prod(discrete_size))
+        logger.info(f"Building prediction lattice: {n_combos} combinations x {len(study_grid)} study points")
+
+        values = open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(n_combos, len(study_grid)))
+        step = max(1, Config.LATTICE_BUILD_ROWS // len(study_grid))
+        for start in range(0, n_combos, step):
+            combos = np.arange(start, min(start + step, n_combos))
+            X = _grid_rows(discrete_size, discrete_min, combos, study_grid)
+            values[start:start + len(combos)] = predictor.predict(X).reshape(len(combos), len(study_grid))
+        values.flush()
+        del values
+
+        study_step = float(study_grid[1] - study_grid[0])
+        with open(tmp_meta_path, 'w') as f:
+            json.dump({
+                'discrete_features': discrete,
+                'discrete_min': discrete_min,
+                'discrete_size': discrete_size,
+                'study_min': float(study_grid[0]),
+                'study_step': study_step
+            }, f, indent=4)
+
+        max_error = check_lattice(PredictionLattice.load(tmp_path, tmp_meta_path), predictor)
+        os.replace(tmp_path, path)
+        os.replace(tmp_meta_path, meta_path)
+        logger.info(f"Prediction lattice saved to {path} (max interpolation error {max_error:.4f})")
+        return PredictionLattice.load(path, meta_path)
+
+    except Exception as e:
+        logger.error(f"Error building prediction lattice: {str(e)}")
+        for leftover in (tmp_path, tmp_meta_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+
+
+def check_lattice(lattice, predictor):
+    """Maximum |lattice - model| at grid midpoints and random inputs"""
+    n_combos, n_study = lattice.values.shape
+    midpoints = lattice.study_min + (np.arange(n_study - 1) + 0.5) * lattice.study_step
+
+    max_error = 0.0
+    step = max(1, Config.LATTICE_BUILD_ROWS // len(midpoints))
+    for start in range(0, n_combos, step):
+        combos = np.arange(start, min(start + step, n_combos))
+        X = _grid_rows(lattice.discrete_size, lattice.discrete_min, combos, midpoints)
+        max_error = max(max_error, float(np.max(np.abs(lattice.lookup(X) - predictor.predict(X)))))
+
+    rng = np.random.default_rng(Config.RANDOM_STATE)
+    low, high = feature_bounds()
+    X = rng.uniform(low, high + 1, size=(Config.LATTICE_CHECK_SAMPLES, len(low)))
+    study_idx = Config.FEATURE_COLUMNS.index(STUDY_FEATURE)
+    X[:, study_idx] = rng.uniform(low[study_idx], high[study_idx], size=len(X))
+    X = np.where(np.arange(len(low)) == study_idx, X, np.minimum(np.floor(X), high))
+    max_error = max(max_error, float(np.max(np.abs(lattice.lookup(X) - predictor.predict(X)))))
+    return max_error
+
+
+if __name__ == "__main__":
+    build_lattice()
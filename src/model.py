@@ -1,7 +1,8 @@
+import warnings
 from sklearn.pipeline import Pipeline
 from xgboost import XGBRegressor
-from sklearn.model_selection import GridSearchCV
 from config.config import Config
+from src.search import run_search
 from utils.logger import setup_logger
 
 logger = setup_logger('model')
@@ -13,41 +14,38 @@ def create_pipeline():
             random_state=Config.RANDOM_STATE,
             n_estimators=100,
             learning_rate=0.1,
+            tree_method=Config.TREE_METHOD,
             n_jobs=-1
         ))
     ])
 
-def train_model(pipeline, X_train, y_train, feature_names):
-    """Train model with grid search CV"""
+def set_booster(regressor, booster):
+    """Install a Booster trained with xgb.train as the regressor's model, through load_model"""
+    with warnings.catch_warnings():
+        # The regressor keeps its own sklearn parameters; the booster has none to restore
+        warnings.filterwarnings('ignore', message='Loading a native XGBoost model')
+        regressor.load_model(booster.save_raw())
+
+def train_model(pipeline, X_train, y_train, feature_names, strategy=None, param_grid=None, time_budget=None):
+    """Train model with hyperparameter search (see src.search for strategies)"""
     try:
-        logger.info("Starting model training with GridSearchCV...")
-        
-        # Update parameter grid for XGBoost
-        param_grid = {
-            'regressor__max_depth': [3, 4, 5, 6],
-            'regressor__learning_rate': [0.01, 0.1],
-            'regressor__n_estimators': [100, 200],
-            'regressor__min_child_weight': [1, 3],
-            'regressor__subsample': [0.8, 0.9],
-            'regressor__colsample_bytree': [0.8, 0.9]
-        }
-        
-        grid_search = GridSearchCV(
-            pipeline,
-            param_grid,
-            cv=Config.CV_FOLDS,
-            n_jobs=-1,
-            scoring='r2',
-            verbose=1
+        strategy = strategy or Config.SEARCH_STRATEGY
+        logger.info(f"Starting model training with {strategy} search...")
+        
+        result = run_search(
+            pipeline, X_train, y_train,
+            strategy=strategy,
+            param_grid=param_grid,
+            time_budget=time_budget,
+            results_path=Config.SEARCH_RESULTS_PATH
         )
         
-        grid_search.fit(X_train, y_train)
-        
-        logger.info(f"Best parameters: {grid_search.best_params_}")
-        logger.info(f"Best score: {grid_search.best_score_:.4f}")
+        logger.info(f"Best parameters: {result.best_params}")
+        logger.info(f"Best score: {result.best.score:.4f}")
+        logger.info(f"Search took {result.elapsed:.1f}s for {result.n_fits} fits ({result.n_reused} fold scores reused)")
         
         # Get feature importance from the best model
-        best_model = grid_search.best_estimator_
+        best_model = result.model
         xgb_model = best_model.named_steps['regressor']
         feature_importance = dict(zip(feature_names, xgb_model.feature_importances_))
         logger.info(f"Feature importance: {feature_importance}")
@@ -61,4 +59,4 @@ def train_model(pipeline, X_train, y_train, feature_names):
         
     except Exception as e:
         logger.error(f"Error in model training: {str(e)}")
-        raise
\ No newline at end of file
+        raise
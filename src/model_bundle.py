@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime
+import numpy as np
+from config.config import Config
+from src.inference import AffineScaler
+from src.tree_compiler import CompiledEnsemble
+from utils.logger import setup_logger
+
+logger = setup_logger('model_bundle')
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+CURRENT = 'CURRENT'  # name of the live version, replaced atomically
+SCALER_FILE = 'scaler.npy'
+TREE_FILE = 'trees_{}.npy'
+
+
+def _booster_bytes(booster):
+    """Booster in UBJSON (XGBoost >= 1.6) or the native binary format, and its extension"""
+    try:
+        return bytes(booster.save_raw(raw_format='ubj')), 'ubj'
+    except TypeError:
+        return bytes(booster.save_raw()), 'bin'
+
+
+def current_version(directory=Config.MODEL_BUNDLE_DIR):
+    """Name of the live bundle version, or None if no bundle was saved"""
+    try:
+        with open(os.path.join(directory, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune(directory, keep):
+    versions_dir = os.path.join(directory, 'versions')
+    versions = sorted((e for e in os.scandir(versions_dir) if e.is_dir() and not e.name.startswith('.')),
+                      key=lambda e: e.stat().st_mtime, reverse=True)
+    live = current_version(directory)
+    for entry in [e for e in versions if e.name != live][max(0, keep - 1):]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def save_bundle(model=None, scaler=None, directory=Config.MODEL_BUNDLE_DIR):
+    """Write the model in the serving format and make it the live version.
+
+    A version is a directory ``versions/<hash>/`` holding the booster in
+    XGBoost's own format, the scaler as a (2, n_features) array of scale
+    and offset, the compiled trees as one .npy per array, and a manifest
+    with the feature order, validation schema and data hash. ``CURRENT``
+    names the live version. Saving a model that is already bundled only
+    repoints ``CURRENT``.
+    """
+    try:
+        if model is None:
+            with open(Config.MODEL_PATH, 'rb') as f:
+                model = pickle.load(f)
+        if scaler is None:
+            with open(Config.SCALER_PATH, 'rb') as f:
+                scaler = pickle.load(f)
+
+        regressor = model.named_steps['regressor'] if hasattr(model, 'named_steps') else model
+        booster = regressor.get_booster()
+        booster_bytes, booster_format = _booster_bytes(booster)
+        scaler_array = np.vstack([scaler.scale_, scaler.min_]).astype(np.float64)
+
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(booster_bytes)
+        digest.update(scaler_array.tobytes())
+        version = digest.hexdigest()
+
+        directory = os.fspath(directory)
+        versions_dir = os.path.join(directory, 'versions')
+        target = os.path.join(versions_dir, version)
+        if not os.path.exists(os.path.join(target, MANIFEST)):
+            os.makedirs(versions_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(dir=versions_dir, prefix='.build-')
+            os.chmod(staging, 0o755)
+            booster_file = f'booster.{booster_format}'
+            with open(os.path.join(staging, booster_file), 'wb') as f:
+                f.write(booster_bytes)
+            np.save(os.path.join(staging, SCALER_FILE), scaler_array)
+            ensemble = CompiledEnsemble.from_booster(booster)
+            for name in CompiledEnsemble.ARRAYS:
+                np.save(os.path.join(staging, TREE_FILE.format(name)), getattr(ensemble, name))
+
+            import xgboost
+            from src.dataset import dataset_hash
+            best_iteration = getattr(booster, 'best_iteration', None)
+            manifest = {
+                'format_version': FORMAT_VERSION,
+                'version': version,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'feature_columns': list(Config.FEATURE_COLUMNS),
+                'target_column': Config.TARGET_COLUMN,
+                'schema': {c: Config.get_feature_range(c) for c in Config.FEATURE_COLUMNS},
+                'data_hash': dataset_hash(),
+                'booster': {
+                    'file': booster_file,
+                    'format': booster_format,
+                    'n_trees': ensemble.n_trees,
+                    'best_iteration': None if best_iteration is None else int(best_iteration),
+                    'xgboost_version': xgboost.__version__
+                },
+                'scaler': {'file': SCALER_FILE},
+                'trees': {'base_score': ensemble.base_score, 'max_depth': ensemble.max_depth}
+            }
+            with open(os.path.join(staging, MANIFEST), 'w') as f:
+                json.dump(manifest, f, indent=4)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+            logger.info(f"Model bundle {version} saved to {target}")
+
+        os.utime(target)
+        with open(os.path.join(directory, f'{CURRENT}.tmp'), 'w') as f:
+            f.write(version)
+        os.replace(os.path.join(directory, f'{CURRENT}.tmp'), os.path.join(directory, CURRENT))
+        _prune(directory, Config.MODEL_BUNDLE_KEEP)
+        return target
+
+    except Exception as e:
+        logger.error(f"Error saving model bundle: {str(e)}")
+        raise
+
+
+class ModelBundle:
+    """A saved bundle version whose parts are loaded on first access.
+
+    Opening reads only the manifest. XGBoost is imported when ``booster``
+    is first used, and the compiled tree arrays are memory-mapped, so a
+    serving mode touches only the files it needs and pages in only the
+    parts of them it reads.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(os.path.join(self.path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model bundle format {self.manifest['format_version']} in {self.path}")
+        if self.manifest['feature_columns'] != list(Config.FEATURE_COLUMNS):
+            raise ValueError(f"Model bundle {self.version} expects features {self.manifest['feature_columns']}")
+        self._booster = None
+        self._scaler = None
+        self._ensemble = None
+
+    @classmethod
+    def open(cls, directory=Config.MODEL_BUNDLE_DIR):
+        """The live version named by ``CURRENT``"""
+        version = current_version(directory)
+        if version is None:
+            raise FileNotFoundError(f"No model bundle in {directory}")
+        return cls(os.path.join(directory, 'versions', version))
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def columns(self):
+        return self.manifest['feature_columns']
+
+    @property
+    def booster(self):
+        if self._booster is None:
+            import xgboost as xgb
+            booster = xgb.Booster()
+            booster.load_model(os.path.join(self.path, self.manifest['booster']['file']))
+            # Not every XGBoost version restores it on load; without it an
+            # early-stopped model would be served with all of its trees
+            best_iteration = self.manifest['booster'].get('best_iteration')
+            if best_iteration is not None:
+                booster.set_attr(best_iteration=str(best_iteration))
+                booster.best_iteration = best_iteration
+            self._booster = booster
+        return self._booster
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            scale, offset = np.load(os.path.join(self.path, self.manifest['scaler']['file']))
+            self._scaler = AffineScaler(scale, offset)
+        return self._scaler
+
+    @property
+    def ensemble(self):
+        if self._ensemble is None:
+            arrays = {
+                name: np.load(os.path.join(self.path, TREE_FILE.format(name)), mmap_mode='r')
+                for name in CompiledEnsemble.ARRAYS
+            }
+            self._ensemble = CompiledEnsemble(**arrays, **self.manifest['trees'])
+        return self._ensemble
+
+
+if __name__ == "__main__":
+    save_bundle()
@@ -0,0 +1,138 @@
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+from config.config import Config
+from src.inference import artifact_version, load_predictor, model_version
+from src.validation import feature_bounds
+from utils.logger import setup_logger
+
+logger = setup_logger('reloader')
+
+
+class LoadedModel:
+    """A warmed-up predictor and the model version it serves"""
+
+    def __init__(self, predictor, version, stamp):
+        self.predictor = predictor
+        self.version = version
+        self.stamp = stamp  # artifact_version() when it was loaded
+        self.loaded_at = time.time()
+
+
+def warm_up(predictor):
+    """Run the single-row and batch paths once so the first request does not pay for
+    lazy loading, page faults on memory-mapped arrays or XGBoost's first-call setup"""
+    low, high = feature_bounds()
+    X = np.vstack([low, (low + high) / 2, high])
+    predictor.predict(X)
+    predictor.predict_one(SimpleNamespace(**dict(zip(predictor.columns, X[1]))))
+
+
+class ModelReloader:
+    """Serve one model version at a time and swap in new ones without a restart.
+
+    ``current`` is replaced with a single reference assignment, so a
+    request that reads it once keeps the version it started with until it
+    finishes, while new requests get the new one. New versions are loaded
+    and warmed up off the request path, either by the watcher thread,
+    which polls the serving mode's artifacts every ``interval`` seconds
+    (waiting one more poll for a write in progress to settle), or by
+    ``reload()``. A version that fails to load leaves the old one serving.
+    Only a change of the last artifact training writes (the bundle's
+    CURRENT pointer, the model file, the lattice axes) counts as a new
+    version, so a new scaler is never paired with the old model.
+    The model loaded at construction is warmed up by ``start()``, so a
+    process that forks workers never runs a prediction (and starts
+    XGBoost's OpenMP pool) before the fork.
+    """
+
+    def __init__(self, mode=None, interval=Config.MODEL_RELOAD_INTERVAL):
+        self.mode = mode or Config.SERVING_MODE
+        self.interval = interval
+        self.threads = None
+        self.reloads = 0
+        self.failures = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = None
+        self._failed = None
+        self._warm = False
+        self.current = self._load(warm=False)
+
+    def _changed(self, stamp):
+        """Whether ``stamp`` is a new, complete version: its commit point moved"""
+        return stamp[-1] != self.current.stamp[-1]
+
+    def _load(self, warm=True):
+        stamp = artifact_version(self.mode)
+        version = model_version(self.mode)
+        predictor = load_predictor(self.mode)
+        if self.threads:
+            predictor.set_threads(self.threads)
+        if warm:
+            warm_up(predictor)
+        return LoadedModel(predictor, version, stamp)
+
+    def set_threads(self, n_threads):
+        self.threads = n_threads
+        self.current.predictor.set_threads(n_threads)
+
+    def reload(self, force=False):
+        """Load the artifacts on disk and swap them in; returns whether a swap happened.
+
+        Without ``force`` nothing is loaded unless the last-written artifact changed.
+        """
+        with self._lock:
+            if not force and not self._changed(artifact_version(self.mode)):
+                return False
+            previous = self.current
+            start = time.perf_counter()
+            try:
+                loaded = self._load()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error loading new model version, still serving {previous.version}: {str(e)}")
+                raise
+            self.current = loaded
+            self.reloads += 1
+            logger.info(f"Model {previous.version} -> {loaded.version} "
+                        f"(loaded and warmed up in {time.perf_counter() - start:.2f}s)")
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            stamp = artifact_version(self.mode)
+            if not self._changed(stamp) or stamp == self._failed:
+                self._pending = None
+                continue
+            if stamp != self._pending:
+                # Changed since the last poll: training may still be writing
+                self._pending = stamp
+                continue
+            try:
+                self.reload()
+            except Exception:
+                # Retried once the artifacts change again
+                self._failed = stamp
+            self._pending = None
+
+    def start(self):
+        """Warm up the current model and start the watcher thread (per process:
+        threads do not survive fork)"""
+        if not self._warm:
+            warm_up(self.current.predictor)
+            self._warm = True
+        if self.interval and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='model_reloader', daemon=True)
+            self._thread.start()
+            logger.info(f"Watching {self.mode} model artifacts every {self.interval}s")
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,218 @@
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config.config import Config
+from src.inference import load_predictor
+from src.validation import validate_matrix, violation_messages
+from utils.logger import setup_logger
+from utils.resources import available_cpus
+
+logger = setup_logger('scoring')
+
+PREDICTION_COLUMN = 'prediction'
+ERROR_COLUMN = 'error'
+
+# Set in each pool worker by _init_worker
+_predictor = None
+
+
+def _init_worker(mode):
+    global _predictor
+    _predictor = load_predictor(mode)
+    _predictor.set_threads(1)
+
+
+def csv_tasks(path, chunk_bytes=Config.SCORE_CHUNK_BYTES):
+    """Header and (start, end) byte ranges of ``path`` cut at line ends.
+
+    Workers parse their own range, so CSV parsing is spread over the
+    pool too. Assumes no quoted newlines, as in Config.DATA_PATH exports.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline().decode().strip().split(',')
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _read_csv_range(path, header, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    usecols = [c for c in header if c in Config.FEATURE_COLUMNS or c == Config.SPLIT_KEY_COLUMN]
+    return pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=usecols)
+
+
+def parquet_batches(path, chunk_rows=Config.SCORE_CHUNK_ROWS):
+    """DataFrames of at most ``chunk_rows`` rows of the needed columns of a Parquet file"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet input requires pyarrow (pip install pyarrow)")
+    parquet = pq.ParquetFile(path)
+    names = parquet.schema_arrow.names
+    columns = [c for c in names if c in Config.FEATURE_COLUMNS or c == Config.SPLIT_KEY_COLUMN]
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield batch.to_pandas()
+
+
+def score_matrix(values, predictor):
+    """Predictions (NaN where invalid) and validation errors ('' where valid) for a
+    raw feature matrix in FEATURE_COLUMNS order, validated in one vectorized pass"""
+    invalid = validate_matrix(values)
+    valid_rows = ~invalid.any(axis=1)
+    predictions = np.full(len(values), np.nan, dtype=np.float64)
+    if valid_rows.any():
+        predictions[valid_rows] = predictor.predict(values[valid_rows])
+    errors = np.full(len(values), '', dtype=object)
+    for pos, message in violation_messages(values, invalid).items():
+        errors[pos] = message
+    return predictions, errors
+
+
+def score_frame(df):
+    """Score a chunk with the worker's predictor.
+
+    Returns a DataFrame with the key column (if present), the prediction
+    (NaN for invalid rows) and the validation error (empty if valid).
+    """
+    missing = [c for c in Config.FEATURE_COLUMNS if c not in df.columns]
+    if missing:
+        raise KeyError(f"Input is missing feature columns: {missing}")
+    predictions, errors = score_matrix(df[Config.FEATURE_COLUMNS].to_numpy(dtype=np.float64), _predictor)
+
+    result = {}
+    if Config.SPLIT_KEY_COLUMN in df.columns:
+        result[Config.SPLIT_KEY_COLUMN] = df[Config.SPLIT_KEY_COLUMN].to_numpy()
+    result[PREDICTION_COLUMN] = predictions
+    result[ERROR_COLUMN] = errors
+    return pd.DataFrame(result)
+
+
+def _score_task(task, as_csv):
+    """Score one task in a worker; CSV output is formatted there as well"""
+    if task[0] == 'csv':
+        _, path, header, start, end = task
+        df = _read_csv_range(path, header, start, end)
+    else:
+        df = task[1]
+    result = score_frame(df)
+    n_invalid = int((result[ERROR_COLUMN] != '').sum())
+    if as_csv:
+        return len(result), n_invalid, result.to_csv(index=False, header=False, float_format='%.6f').encode()
+    return len(result), n_invalid, result
+
+
+class _Writer:
+    def __init__(self, path, key_column):
+        self.path = path
+        self.columns = ([key_column] if key_column else []) + [PREDICTION_COLUMN, ERROR_COLUMN]
+        self.parquet = str(path).endswith('.parquet')
+        self._writer = None
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        else:
+            self._file = open(path, 'wb')
+            self._file.write((','.join(self.columns) + '\n').encode())
+
+    def write(self, chunk):
+        if not self.parquet:
+            self._file.write(chunk)
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self.parquet:
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._file.close()
+
+
+def score_file(input_path, output_path, mode=None, workers=None, chunk_bytes=Config.SCORE_CHUNK_BYTES,
+               chunk_rows=Config.SCORE_CHUNK_ROWS, progress_interval=Config.SCORE_PROGRESS_INTERVAL):
+    """Score every row of a CSV or Parquet file with a pool of worker processes.
+
+    Each worker loads the ``mode`` predictor (default
+    ``Config.SERVING_MODE``) once and scores whole chunks. At most two
+    chunks per worker are in flight, and results are written in input
+    order as soon as the oldest one is done, so memory stays bounded
+    whatever the file size. Returns (rows, invalid rows, seconds).
+    """
+    mode = mode or Config.SERVING_MODE
+    workers = workers or available_cpus()
+    parquet_input = str(input_path).endswith('.parquet')
+    as_csv = not str(output_path).endswith('.parquet')
+
+    try:
+        if parquet_input:
+            import pyarrow.parquet as pq
+            parquet = pq.ParquetFile(input_path)
+            names, total = parquet.schema_arrow.names, parquet.metadata.num_rows
+            tasks = (('frame', df) for df in parquet_batches(input_path, chunk_rows))
+        else:
+            names, ranges = csv_tasks(input_path, chunk_bytes)
+            total = os.path.getsize(input_path)
+            tasks = (('csv', os.fspath(input_path), names, start, end) for start, end in ranges)
+        key_column = Config.SPLIT_KEY_COLUMN if Config.SPLIT_KEY_COLUMN in names else None
+
+        logger.info(f"Scoring {input_path} with {workers} workers ({mode} model) into {output_path}")
+        writer = _Writer(output_path, key_column)
+        start = time.monotonic()
+        next_report = start + progress_interval
+        # Progress is measured in bytes of CSV or rows of Parquet input
+        rows = done = invalid = 0
+
+        def collect(future):
+            nonlocal rows, invalid
+            n_rows, n_invalid, chunk = future.result()
+            rows += n_rows
+            invalid += n_invalid
+            writer.write(chunk)
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mode,)) as pool:
+                pending = deque()
+                for task in tasks:
+                    pending.append((pool.submit(_score_task, task, as_csv),
+                                    task[4] - task[3] if task[0] == 'csv' else len(task[1])))
+                    while len(pending) >= 2 * workers or (pending and pending[0][0].done()):
+                        future, size = pending.popleft()
+                        collect(future)
+                        done += size
+                        now = time.monotonic()
+                        if now >= next_report:
+                            next_report = now + progress_interval
+                            logger.info(f"{done / total:6.1%}  {rows} rows  {rows / (now - start):,.0f} rows/s")
+                while pending:
+                    future, size = pending.popleft()
+                    collect(future)
+        finally:
+            writer.close()
+
+        elapsed = time.monotonic() - start
+        logger.info(f"Scored {rows} rows ({invalid} invalid) in {elapsed:.1f}s, {rows / elapsed:,.0f} rows/s")
+        return rows, invalid, elapsed
+
+    except Exception as e:
+        logger.error(f"Error scoring {input_path}: {str(e)}")
+        raise
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import math
+import time
+import numpy as np
+import xgboost as xgb
+from joblib import Memory, Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterGrid, train_test_split
+from xgboost.sklearn import XGBModel
+from config.config import Config
+from src.search_results import ResultsStore
+from utils.logger import setup_logger
+from utils.resources import plan_training
+
+logger = setup_logger('search')
+
+N_ESTIMATORS = 'regressor__n_estimators'
+
+# Default hyperparameter grid (128 combinations); Config.PARAMS is the full one
+PARAM_GRID = {
+    'regressor__max_depth': [3, 4, 5, 6],
+    'regressor__learning_rate': [0.01, 0.1],
+    'regressor__n_estimators': [100, 200],
+    'regressor__min_child_weight': [1, 3],
+    'regressor__subsample': [0.8, 0.9],
+    'regressor__colsample_bytree': [0.8, 0.9]
+}
+
+
+class Evaluation:
+    """Cross-validated score of one parameter set"""
+
+    def __init__(self, params, score, n_estimators, fold_scores):
+        self.params = params
+        self.score = score
+        self.n_estimators = n_estimators
+        self.fold_scores = fold_scores
+
+
+class SearchResult:
+    def __init__(self, strategy, evaluations, n_fits, elapsed, budget_exhausted, n_reused=0):
+        self.strategy = strategy
+        self.evaluations = evaluations
+        self.n_fits = n_fits
+        self.n_reused = n_reused
+        self.elapsed = elapsed
+        self.budget_exhausted = budget_exhausted
+        self.best = max(evaluations, key=lambda evaluation: evaluation.score)
+        self.model = None
+
+    @property
+    def best_params(self):
+        """Best parameters with n_estimators set to what the search settled on"""
+        return {**self.best.params, N_ESTIMATORS: self.best.n_estimators}
+
+
+class CrossValidator:
+    """Scores pipeline parameter sets with k-fold CV.
+
+    With ``early_stopping_rounds`` each fold holds out
+    ``Config.EARLY_STOPPING_FRACTION`` of its training rows as a validation
+    set, boosting stops once that stops improving, and the number of
+    rounds actually used is reported back.
+
+    When the pipeline is a bare XGBoost regressor and ``shared_dmatrix`` is
+    set, each fold's rows are turned into a DMatrix once and every
+    candidate trains on those with ``xgb.train``. XGBoost (>= 1.5) keeps
+    the hist bins on the DMatrix, so the quantile cuts are computed once
+    per fold instead of once per fit. Other pipelines go through sklearn
+    with their transformers memoized in ``Config.PIPELINE_CACHE_DIR``.
+
+    With a ``store`` (src.search_results.ResultsStore) every fold score is
+    saved as it is computed, and folds already in the store for the same
+    ``context`` are read back instead of fitted.
+    """
+
+    def __init__(self, pipeline, X, y, n_folds=Config.CV_FOLDS, early_stopping_rounds=None, n_jobs=-1,
+                 shared_dmatrix=Config.SHARED_DMATRIX, store=None):
+        self.X = np.asarray(X)
+        self.y = np.asarray(y)
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_jobs = n_jobs
+        self.n_fits = 0
+        self.n_reused = 0
+        self.store = store
+        self.context = self._context(pipeline, n_folds) if store is not None else None
+
+        self.folds = []
+        for train_idx, test_idx in KFold(n_splits=n_folds).split(self.X):
+            stop_idx = None
+            if early_stopping_rounds:
+                train_idx, stop_idx = train_test_split(
+                    train_idx,
+                    test_size=Config.EARLY_STOPPING_FRACTION,
+                    random_state=Config.RANDOM_STATE
+                )
+            self.folds.append((train_idx, stop_idx, test_idx))
+
+        regressor = pipeline.steps[-1][1]
+        self.shared = shared_dmatrix and len(pipeline.steps) == 1 and isinstance(regressor, XGBModel)
+        if self.shared:
+            self.pipeline = pipeline
+            self.dmatrices = self._fold_dmatrices(regressor)
+        elif len(pipeline.steps) > 1 and pipeline.memory is None:
+            self.pipeline = clone(pipeline).set_params(memory=Memory(str(Config.PIPELINE_CACHE_DIR), verbose=0))
+        else:
+            self.pipeline = pipeline
+
+    def _context(self, pipeline, n_folds):
+        """Hash of everything a fold score depends on besides the candidate's parameters"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(self.X, dtype=np.float64).tobytes())
+        digest.update(np.ascontiguousarray(self.y, dtype=np.float64).tobytes())
+        # Step parameters only; thread counts do not change the scores
+        base = {name: value for name, value in pipeline.get_params().items()
+                if '__' in name and not name.endswith(('n_jobs', 'nthread'))}
+        layout = [n_folds, self.early_stopping_rounds, Config.EARLY_STOPPING_FRACTION,
+                  Config.RANDOM_STATE, xgb.__version__]
+        digest.update(json.dumps([base, layout], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _fold_dmatrices(self, regressor):
+        full = xgb.DMatrix(self.X, label=self.y, missing=regressor.missing, nthread=-1)
+        dmatrices = [
+            tuple(None if idx is None else full.slice(idx) for idx in fold)
+            for fold in self.folds
+        ]
+        # Build the hist bins up front: the first fit on a DMatrix creates
+        # them, and candidates on parallel threads would otherwise race to
+        if regressor.tree_method in ('hist', 'approx'):
+            warm_up = {'tree_method': regressor.tree_method, 'max_bin': regressor.get_params().get('max_bin'), 'nthread': -1}
+            for dtrain, _, _ in dmatrices:
+                xgb.train({k: v for k, v in warm_up.items() if v is not None}, dtrain, num_boost_round=1)
+        return dmatrices
+
+    def _fit_fold(self, params, fold_idx):
+        if self.shared:
+            return self._train_fold(params, fold_idx)
+
+        train_idx, stop_idx, test_idx = self.folds[fold_idx]
+        model = clone(self.pipeline).set_params(**params)
+        fit_params = {}
+        if self.early_stopping_rounds:
+            fit_params = {
+                'regressor__eval_set': [(self.X[stop_idx], self.y[stop_idx])],
+                'regressor__early_stopping_rounds': self.early_stopping_rounds,
+                'regressor__verbose': False
+            }
+        model.fit(self.X[train_idx], self.y[train_idx], **fit_params)
+
+        regressor = model.named_steps['regressor']
+        if self.early_stopping_rounds:
+            rounds = regressor.get_booster().best_iteration + 1
+        else:
+            rounds = params.get(N_ESTIMATORS, regressor.n_estimators)
+        return r2_score(self.y[test_idx], model.predict(self.X[test_idx])), rounds
+
+    def _train_fold(self, params, fold_idx):
+        """Same fit as XGBRegressor.fit, on the fold's shared DMatrix"""
+        regressor = clone(self.pipeline).set_params(**params).steps[-1][1]
+        dtrain, dstop, dtest = self.dmatrices[fold_idx]
+        booster = xgb.train(
+            regressor.get_xgb_params(), dtrain,
+            num_boost_round=regressor.get_num_boosting_rounds(),
+            evals=[(dstop, 'validation_0')] if self.early_stopping_rounds else (),
+            early_stopping_rounds=self.early_stopping_rounds,
+            verbose_eval=False
+        )
+        rounds = booster.best_iteration + 1 if self.early_stopping_rounds else regressor.get_num_boosting_rounds()
+        predictions = booster.predict(dtest, iteration_range=(0, rounds))
+        return r2_score(self.y[self.folds[fold_idx][2]], predictions), rounds
+
+    def _score_fold(self, params, fold_idx):
+        if self.store is not None:
+            stored = self.store.get(self.context, params, fold_idx)
+            if stored is not None:
+                self.n_reused += 1
+                return stored
+        score, rounds = self._fit_fold(params, fold_idx)
+        self.n_fits += 1
+        if self.store is not None:
+            self.store.put(self.context, params, fold_idx, len(self.folds), score, rounds)
+        return score, rounds
+
+    def evaluate(self, params):
+        results = [self._score_fold(params, fold_idx) for fold_idx in range(len(self.folds))]
+        fold_scores = [score for score, _ in results]
+        n_estimators = int(round(np.mean([rounds for _, rounds in results])))
+        return Evaluation(params, float(np.mean(fold_scores)), n_estimators, fold_scores)
+
+    def evaluate_many(self, candidates, deadline=None):
+        """Evaluate candidates in parallel batches, stopping at the deadline"""
+        evaluations = []
+        batch_size = max(1, effective_n_jobs(self.n_jobs))
+        for start in range(0, len(candidates), batch_size):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            batch = candidates[start:start + batch_size]
+            evaluations.extend(
+                Parallel(n_jobs=self.n_jobs, prefer='threads')(delayed(self.evaluate)(params) for params in batch)
+            )
+        return evaluations
+
+
+def grid_search(cv, param_grid, deadline=None):
+    """Exhaustive search, the equivalent of GridSearchCV"""
+    candidates = list(ParameterGrid(param_grid))
+    logger.info(f"Grid search over {len(candidates)} candidates x {len(cv.folds)} folds")
+    return cv.evaluate_many(candidates, deadline)
+
+
+def halving_search(cv, param_grid, deadline=None):
+    """Successive halving with n_estimators as the resource.
+
+    Every combination of the other parameters starts with
+    ``HALVING_MIN_ESTIMATORS`` rounds; after each rung the best
+    1/``HALVING_FACTOR`` move on with ``HALVING_FACTOR`` times the rounds,
+    up to the largest n_estimators in the grid.
+    """
+    grid = {name: values for name, values in param_grid.items() if name != N_ESTIMATORS}
+    max_resource = max(param_grid.get(N_ESTIMATORS, [Config.HALVING_MIN_ESTIMATORS]))
+    candidates = list(ParameterGrid(grid))
+    resource = min(Config.HALVING_MIN_ESTIMATORS, max_resource)
+    logger.info(f"Successive halving over {len(candidates)} candidates, {resource} to {max_resource} rounds")
+
+    last_rung = []
+    while candidates:
+        rung = cv.evaluate_many([{**params, N_ESTIMATORS: resource} for params in candidates], deadline)
+        if not rung:
+            break
+        last_rung = rung
+        logger.info(f"Rung with {resource} rounds: {len(rung)} candidates, best score {max(e.score for e in rung):.4f}")
+        if len(rung) < len(candidates) or resource >= max_resource or len(rung) == 1:
+            break
+        survivors = sorted(rung, key=lambda evaluation: evaluation.score, reverse=True)
+        survivors = survivors[:max(1, math.ceil(len(rung) / Config.HALVING_FACTOR))]
+        candidates = [{k: v for k, v in e.params.items() if k != N_ESTIMATORS} for e in survivors]
+        resource = min(resource * Config.HALVING_FACTOR, max_resource)
+
+    # Only the deepest rung is comparable across candidates
+    return last_rung
+
+
+def tpe_search(cv, param_grid, deadline=None):
+    """Bayesian search with Optuna's TPE sampler over the grid's values"""
+    try:
+        import optuna
+    except ImportError:
+        raise ImportError("The 'tpe' search strategy requires optuna (pip install optuna)")
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    max_estimators = max(param_grid.get(N_ESTIMATORS, [100]))
+    evaluations = []
+
+    def objective(trial):
+        params = {
+            name: trial.suggest_categorical(name, values)
+            for name, values in param_grid.items() if name != N_ESTIMATORS
+        }
+        params[N_ESTIMATORS] = max_estimators
+        evaluation = cv.evaluate(params)
+        evaluations.append(evaluation)
+        return evaluation.score
+
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    logger.info(f"TPE search with {Config.TPE_TRIALS} trials")
+    study = optuna.create_study(
+        direction='maximize',
+        sampler=optuna.samplers.TPESampler(seed=Config.RANDOM_STATE)
+    )
+    study.optimize(objective, n_trials=Config.TPE_TRIALS, timeout=timeout, n_jobs=cv.n_jobs)
+    return evaluations
+
+
+STRATEGIES = {
+    'grid': (grid_search, False),
+    'halving': (halving_search, True),
+    'tpe': (tpe_search, True)
+}
+
+
+def run_search(pipeline, X_train, y_train, strategy=None, param_grid=None, time_budget=None,
+               outer_jobs=None, inner_threads=None, results_path=None):
+    """Search hyperparameters and refit the best pipeline on all training rows.
+
+    ``time_budget`` (seconds) stops launching new evaluations once spent;
+    the best candidate found so far is used. Candidates run on
+    ``outer_jobs`` threads with ``inner_threads`` XGBoost threads each
+    (see utils.resources.plan_training); the final refit gets all of them.
+    With ``results_path`` fold scores are kept in that SQLite file, and a
+    search that was interrupted, or overlaps an earlier one on the same
+    data, only fits the folds missing from it.
+    """
+    strategy = strategy or Config.SEARCH_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {strategy}")
+    param_grid = param_grid or PARAM_GRID
+    search_fn, early_stopping = STRATEGIES[strategy]
+
+    outer_jobs, inner_threads = plan_training(outer_jobs, inner_threads)
+    logger.info(f"Training with {outer_jobs} parallel jobs x {inner_threads} XGBoost threads")
+
+    store = ResultsStore(results_path) if results_path else None
+    start = time.monotonic()
+    deadline = start + time_budget if time_budget else None
+    try:
+        cv = CrossValidator(
+            clone(pipeline).set_params(regressor__n_jobs=inner_threads), X_train, y_train,
+            early_stopping_rounds=Config.EARLY_STOPPING_ROUNDS if early_stopping else None,
+            n_jobs=outer_jobs, store=store
+        )
+        evaluations = search_fn(cv, param_grid, deadline)
+    finally:
+        if store is not None:
+            store.close()
+    if cv.n_reused:
+        logger.info(f"Reused {cv.n_reused} fold scores from {results_path}")
+    if not evaluations:
+        raise RuntimeError("Time budget ran out before any candidate was evaluated")
+
+    budget_exhausted = deadline is not None and time.monotonic() >= deadline
+    result = SearchResult(strategy, evaluations, cv.n_fits, time.monotonic() - start, budget_exhausted,
+                          cv.n_reused)
+    if budget_exhausted:
+        logger.warning(f"Time budget of {time_budget}s exhausted after {len(evaluations)} evaluations")
+
+    model = clone(pipeline).set_params(**result.best_params)
+    model.set_params(regressor__n_jobs=outer_jobs * inner_threads).fit(np.asarray(X_train), np.asarray(y_train))
+    # Leave the thread count to whoever loads the model
+    result.model = model.set_params(regressor__n_jobs=pipeline.get_params()['regressor__n_jobs'])
+    return result
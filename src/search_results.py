@@ -0,0 +1,110 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from config.config import Config
+from utils.logger import setup_logger
+
+logger = setup_logger('search_results')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fold_scores (
+    context TEXT NOT NULL,
+    params TEXT NOT NULL,
+    fold INTEGER NOT NULL,
+    n_folds INTEGER NOT NULL,
+    score REAL NOT NULL,
+    rounds INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (context, params, fold)
+)
+"""
+
+
+def params_key(params):
+    """Canonical JSON of a parameter set (numpy scalars as Python values)"""
+    return json.dumps(params, sort_keys=True, default=lambda value: value.item())
+
+
+class ResultsStore:
+    """SQLite table of every (parameter set, fold) score a search has computed.
+
+    Rows are keyed by a ``context`` hash of the training data and the fold
+    layout (see CrossValidator.context), so a search over the same data
+    reuses the folds an interrupted or overlapping earlier search already
+    fitted. Each score is committed as soon as it is known, and the
+    database is in WAL mode, so ``top_k`` can be read from another process
+    while a search is running.
+    """
+
+    def __init__(self, path=Config.SEARCH_RESULTS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+
+    def get(self, context, params, fold):
+        """(score, rounds) of a fold fitted before, or None"""
+        with self._lock:
+            return self._connection.execute(
+                'SELECT score, rounds FROM fold_scores WHERE context = ? AND params = ? AND fold = ?',
+                (context, params_key(params), fold)
+            ).fetchone()
+
+    def put(self, context, params, fold, n_folds, score, rounds):
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO fold_scores VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (context, params_key(params), fold, n_folds, float(score), int(rounds), time.time())
+            )
+            self._connection.commit()
+
+    def latest_context(self):
+        """Context of the most recently stored score"""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT context FROM fold_scores ORDER BY created_at DESC LIMIT 1'
+            ).fetchone()
+        return row[0] if row else None
+
+    def top_k(self, k=10, context=None):
+        """Best ``k`` parameter sets with all folds scored: (params, mean score, mean rounds).
+
+        Defaults to the context of the search that wrote last.
+        """
+        context = context or self.latest_context()
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT params, AVG(score) AS mean_score, AVG(rounds)
+                FROM fold_scores WHERE context = ?
+                GROUP BY params HAVING COUNT(*) = MAX(n_folds)
+                ORDER BY mean_score DESC LIMIT ?
+                """,
+                (context, k)
+            ).fetchall()
+        return [(json.loads(params), score, int(round(rounds))) for params, score, rounds in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Best parameter sets in the search results store")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--context', default=None, help="data/fold context hash (default: latest)")
+    args = parser.parse_args()
+
+    store = ResultsStore()
+    for params, score, rounds in store.top_k(args.top, args.context):
+        params = {name.split('__')[-1]: value for name, value in params.items()}
+        print(f"{score:.4f}  rounds={rounds:<5} {params}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
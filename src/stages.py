@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+import sklearn
+import xgboost
+from config.config import Config
+from utils.logger import setup_logger
+
+logger = setup_logger('stages')
+
+VALUE_FILE = 'value.pkl'
+
+# name: (source files whose code the output depends on, Config fields it
+# reads, Config paths of the artifacts it writes)
+STAGES = {
+    'prepare': (
+        ['src/data_preparation.py', 'src/dataset.py', 'src/validation.py'],
+        ['FEATURE_COLUMNS', 'TARGET_COLUMN', 'DATA_VALIDATION', 'INTEGER_FEATURES', 'TRAIN_DROP_INVALID_ROWS',
+         'TEST_SIZE', 'RANDOM_STATE'],
+        ['SCALER_PATH']
+    ),
+    'train': (
+        ['src/model.py', 'src/search.py'],
+        ['RANDOM_STATE', 'CV_FOLDS', 'PARAMS', 'TREE_METHOD', 'SEARCH_STRATEGY', 'EARLY_STOPPING_ROUNDS',
+         'EARLY_STOPPING_FRACTION', 'HALVING_MIN_ESTIMATORS', 'HALVING_FACTOR', 'TPE_TRIALS'],
+        ['MODEL_PATH']
+    ),
+    'evaluate': (
+        ['src/evaluation.py'],
+        [],
+        ['METRICS_PATH', 'FEATURE_IMPORTANCE_PATH']
+    ),
+    'export': (
+        ['train.py', 'src/tree_compiler.py', 'src/lattice.py', 'src/inference.py', 'src/validation.py'],
+        ['FEATURE_COLUMNS', 'DATA_VALIDATION', 'INTEGER_FEATURES', 'RANDOM_STATE', 'FOLD_CHECK_SAMPLES',
+         'FOLD_CHECK_TOLERANCE', 'LATTICE_STUDY_TIME_STEP', 'LATTICE_BUILD_ROWS', 'LATTICE_CHECK_SAMPLES'],
+        ['COMPILED_MODEL_PATH', 'RAW_MODEL_PATH', 'LATTICE_PATH', 'LATTICE_META_PATH']
+    )
+}
+
+
+def stage_key(name, **inputs):
+    """Hash of a stage's code, Config fields, library versions and ``inputs``.
+
+    ``inputs`` holds everything else the output depends on: the data hash,
+    upstream stage keys and command-line options.
+    """
+    code, fields, _ = STAGES[name]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(name.encode())
+    for path in code:
+        with open(Config.BASE_DIR / path, 'rb') as f:
+            digest.update(f.read())
+    versions = {'numpy': np.__version__, 'sklearn': sklearn.__version__, 'xgboost': xgboost.__version__}
+    config = {field: getattr(Config, field) for field in fields}
+    digest.update(json.dumps([versions, config, inputs], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def model_digest(model):
+    """Hash of the booster and the saved scaler, which the export stage reads"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(bytes(model.named_steps['regressor'].get_booster().save_raw()))
+    with open(Config.SCALER_PATH, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _files_differ(a, b):
+    if not os.path.exists(b) or os.path.getsize(a) != os.path.getsize(b):
+        return True
+    with open(a, 'rb') as fa, open(b, 'rb') as fb:
+        while True:
+            block_a, block_b = fa.read(1 << 20), fb.read(1 << 20)
+            if block_a != block_b:
+                return True
+            if not block_a:
+                return False
+
+
+def _publish(directory, paths):
+    """Copy cached artifacts over the live ones that differ (unchanged files keep their mtime)"""
+    for path in paths:
+        cached = os.path.join(directory, os.path.basename(path))
+        if _files_differ(cached, path):
+            shutil.copyfile(cached, f'{path}.tmp')
+            os.replace(f'{path}.tmp', path)
+
+
+def _prune(stage_dir):
+    versions = sorted((e for e in os.scandir(stage_dir) if e.is_dir() and not e.name.startswith('.')),
+                      key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in versions[Config.STAGE_CACHE_KEEP:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def run_stage(name, key, compute, force=False):
+    """Return the cached output of stage ``name`` for ``key``, or compute and cache it.
+
+    Outputs live in ``Config.STAGE_CACHE_DIR/<name>/<key>/``: the pickled
+    return value of ``compute`` plus copies of the artifacts the stage
+    writes, which are restored on a cache hit.
+    """
+    paths = [os.fspath(getattr(Config, attr)) for attr in STAGES[name][2]]
+    stage_dir = os.path.join(Config.STAGE_CACHE_DIR, name)
+    directory = os.path.join(stage_dir, key)
+
+    if not force and os.path.exists(os.path.join(directory, VALUE_FILE)):
+        logger.info(f"Stage '{name}' unchanged ({key}), using cached outputs")
+        _publish(directory, paths)
+        os.utime(directory)
+        with open(os.path.join(directory, VALUE_FILE), 'rb') as f:
+            return pickle.load(f)
+
+    logger.info(f"Running stage '{name}' ({key})")
+    value = compute()
+
+    os.makedirs(stage_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=stage_dir, prefix='.build-')
+    with open(os.path.join(staging, VALUE_FILE), 'wb') as f:
+        pickle.dump(value, f)
+    for path in paths:
+        shutil.copyfile(path, os.path.join(staging, os.path.basename(path)))
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+    _prune(stage_dir)
+    return value
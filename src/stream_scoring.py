@@ -0,0 +1,161 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+from starlette.responses import StreamingResponse
+from config.config import Config
+
+NAN = float('nan')
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse for generators that read the request body while they respond.
+
+    Starlette's version listens for the client disconnect on ``receive``
+    concurrently, which would swallow the body messages the generator is
+    waiting for. Each chunk is sent once the server has taken the
+    previous one, so a slow reader stalls the generator (and with it the
+    upload) instead of piling up output.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_line_chunks(body, chunk_rows=Config.STREAM_SCORE_CHUNK_ROWS,
+                           max_line_bytes=Config.STREAM_SCORE_MAX_LINE_BYTES, buffer=b''):
+    """Lists of up to ``chunk_rows`` lines from an async iterator of bytes.
+
+    Blank lines are kept, so positions match input lines. ``buffer`` holds
+    bytes already read from ``body``. Only one partial line and one chunk
+    of lines are held at a time.
+    """
+    lines = []
+    async for data in body:
+        parts = (buffer + data).split(b'\n')
+        buffer = parts.pop()
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"Line longer than {max_line_bytes} bytes")
+        lines.extend(parts)
+        while len(lines) >= chunk_rows:
+            yield lines[:chunk_rows]
+            lines = lines[chunk_rows:]
+    if buffer:
+        lines.append(buffer)
+    if lines:
+        yield lines
+
+
+async def read_header(body, max_line_bytes=Config.STREAM_SCORE_MAX_LINE_BYTES):
+    """CSV header columns and the bytes read after it"""
+    buffer = b''
+    async for data in body:
+        buffer += data
+        if b'\n' in buffer:
+            break
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"Line longer than {max_line_bytes} bytes")
+    header, _, rest = buffer.partition(b'\n')
+    return [name.strip() for name in header.decode().split(',')], rest
+
+
+def _skip_blank_lines(parse, lines, *args):
+    """``parse`` applied to the non-blank lines, with an error row for each blank one"""
+    blank = [not line.strip() for line in lines]
+    if not any(blank):
+        return parse(lines, *args)
+    kept = [pos for pos, is_blank in enumerate(blank) if not is_blank]
+    values = np.full((len(lines), len(Config.FEATURE_COLUMNS)), np.nan)
+    errors = {pos: "empty line" for pos, is_blank in enumerate(blank) if is_blank}
+    if kept:
+        kept_values, kept_errors = parse([lines[pos] for pos in kept], *args)
+        values[kept] = kept_values
+        errors.update({kept[pos]: message for pos, message in kept_errors.items()})
+    return values, errors
+
+
+def parse_ndjson(lines):
+    """Feature matrix of NDJSON lines (NaN where a value is missing or not a number)
+    and messages for lines that are blank or not JSON objects"""
+    return _skip_blank_lines(_parse_ndjson, lines)
+
+
+def _parse_ndjson(lines):
+    # Fast path: parse the chunk as one array. A line holding several values
+    # (`1,2`) or part of one would shift every later row, so the result is
+    # only used if it is one object per line and every feature is a number.
+    try:
+        records = json.loads(b'[' + b','.join(lines) + b']')
+    except ValueError:
+        records = None
+    if (records is not None and len(records) == len(lines)
+            and all(type(record) is dict for record in records)
+            and all(line.lstrip()[:1] == b'{' and line.rstrip()[-1:] == b'}' for line in lines)):
+        rows = [[record.get(c, NAN) for c in Config.FEATURE_COLUMNS] for record in records]
+        if {type(value) for row in rows for value in row} <= {int, float}:
+            return np.array(rows, dtype=np.float64), {}
+
+    # Slow path: line by line, with an error for each line that is not an object
+    errors = {}
+    values = np.full((len(lines), len(Config.FEATURE_COLUMNS)), np.nan)
+    for pos, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            errors[pos] = f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            errors[pos] = "Expected a JSON object"
+            continue
+        for j, column in enumerate(Config.FEATURE_COLUMNS):
+            value = record.get(column)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[pos, j] = value
+    return values, errors
+
+
+def parse_csv(lines, header):
+    """Feature matrix of CSV lines under ``header`` (NaN where a value is not a number)
+    and messages for blank lines"""
+    return _skip_blank_lines(_parse_csv, lines, header)
+
+
+def _parse_csv(lines, header):
+    try:
+        df = pd.read_csv(io.BytesIO(b'\n'.join(lines)), header=None, names=header,
+                         usecols=Config.FEATURE_COLUMNS)
+    except (ValueError, pd.errors.ParserError):
+        # Rows with the wrong number of fields: parse line by line
+        rows = [line.decode(errors='replace').split(',') for line in lines]
+        df = pd.DataFrame([row if len(row) == len(header) else [None] * len(header) for row in rows],
+                          columns=header)[Config.FEATURE_COLUMNS]
+    return np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(np.float64)
+                            for c in Config.FEATURE_COLUMNS]), {}
+
+
+def format_ndjson(start, predictions, errors):
+    lines = []
+    for i, (prediction, error) in enumerate(zip(predictions.tolist(), errors), start):
+        if error:
+            lines.append(json.dumps({"index": i, "prediction": None, "error": error}))
+        else:
+            lines.append(f'{{"index":{i},"prediction":{prediction:.6f}}}')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def format_csv(start, predictions, errors):
+    frame = pd.DataFrame({
+        'index': np.arange(start, start + len(predictions)),
+        'prediction': predictions,
+        'error': errors
+    })
+    return frame.to_csv(index=False, header=False, float_format='%.6f').encode()
+
+
+def format_failure(message, csv=False):
+    """In-band record for an error after the response has started"""
+    if csv:
+        return ',,"{}"\n'.format(str(message).replace('"', '""')).encode()
+    return (json.dumps({"index": None, "prediction": None, "error": str(message)}) + '\n').encode()
@@ -0,0 +1,163 @@
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+import xgboost as xgb
+from sklearn.preprocessing import MinMaxScaler
+from config.config import Config
+from src.dataset import iter_chunks
+from src.evaluation import save_evaluation
+from src.model import create_pipeline, set_booster
+from src.validation import validate_matrix
+from utils.logger import setup_logger
+
+logger = setup_logger('streaming')
+
+
+def split_hash(keys):
+    """Uniform [0, 1) value per key (splitmix64), stable across runs and chunk sizes"""
+    x = np.asarray(keys).astype(np.uint64) + np.uint64(Config.RANDOM_STATE)
+    x = x * np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def iter_split(split, path=Config.DATA_PATH):
+    """Yield (X DataFrame, y) chunks of the valid rows of the 'train' or 'test' split.
+
+    A row is in the test split when the hash of its
+    ``Config.SPLIT_KEY_COLUMN`` falls below ``Config.TEST_SIZE``.
+    """
+    columns = Config.FEATURE_COLUMNS + [Config.TARGET_COLUMN, Config.SPLIT_KEY_COLUMN]
+    for chunk in iter_chunks(columns, Config.STREAM_CHUNK_ROWS, path):
+        in_test = split_hash(chunk[Config.SPLIT_KEY_COLUMN].to_numpy()) < Config.TEST_SIZE
+        X = chunk[Config.FEATURE_COLUMNS]
+        keep = (in_test if split == 'test' else ~in_test) & ~validate_matrix(X.to_numpy()).any(axis=1)
+        if keep.any():
+            yield X[keep], chunk[Config.TARGET_COLUMN].to_numpy()[keep]
+
+
+class ChunkIterator(xgb.DataIter):
+    """Feeds scaled chunks of one split to XGBoost's external-memory DMatrix"""
+
+    def __init__(self, split, scaler, cache_prefix, path=Config.DATA_PATH):
+        self.split = split
+        self.path = path
+        self.scaler = scaler
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_split(self.split, self.path)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return 0
+        X, y = chunk
+        input_data(data=self.scaler.transform(X).astype(np.float32), label=y)
+        return 1
+
+    def reset(self):
+        self._chunks = None
+
+
+class StreamingMetrics:
+    """Running sums for the evaluate_model metrics over chunks of predictions"""
+
+    def __init__(self):
+        self.n = 0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+        self.sse = 0.0
+        self.sse_exp = 0.0
+        self.sae_exp = 0.0
+
+    def update(self, y, pred):
+        y = np.asarray(y, dtype=np.float64)
+        pred = np.asarray(pred, dtype=np.float64)
+        self.n += len(y)
+        self.sum_y += float(y.sum())
+        self.sum_y2 += float(np.square(y).sum())
+        self.sse += float(np.square(y - pred).sum())
+        diff_exp = np.exp(y) - np.exp(pred)
+        self.sse_exp += float(np.square(diff_exp).sum())
+        self.sae_exp += float(np.abs(diff_exp).sum())
+
+    def result(self, prefix):
+        total = self.sum_y2 - self.sum_y ** 2 / self.n
+        return {
+            f'{prefix}_r2': 1.0 - self.sse / total,
+            f'{prefix}_rmse': float(np.sqrt(self.sse_exp / self.n)),
+            f'{prefix}_mae': self.sae_exp / self.n
+        }
+
+
+def fit_scaler(path=Config.DATA_PATH):
+    """MinMaxScaler fitted incrementally over the training split"""
+    scaler = MinMaxScaler()
+    for X, _ in iter_split('train', path):
+        scaler.partial_fit(X)
+    return scaler
+
+
+def evaluate_streaming(model, scaler, path=Config.DATA_PATH):
+    metrics = {}
+    for split in ('train', 'test'):
+        accumulator = StreamingMetrics()
+        for X, y in iter_split(split, path):
+            accumulator.update(y, model.predict(scaler.transform(X)))
+        metrics.update(accumulator.result(split))
+    # Same key order as evaluate_model
+    return {key: metrics[key] for key in
+            ['train_r2', 'test_r2', 'train_rmse', 'test_rmse', 'train_mae', 'test_mae']}
+
+
+def train_streaming(params=None, path=Config.DATA_PATH, save=True):
+    """Train on data larger than memory and save the same artifacts as train.py.
+
+    The dataset is read in ``Config.STREAM_CHUNK_ROWS`` chunks: once to fit
+    the scaler, then by XGBoost, which pages the scaled chunks to an
+    external-memory cache on disk, and once per split for evaluation. There
+    is no hyperparameter search; ``params`` (default
+    ``Config.STREAM_PARAMS``) override the pipeline's regressor settings.
+    With ``save=False`` nothing is written to the artifacts directory.
+    """
+    try:
+        logger.info("Fitting scaler over the training split...")
+        scaler = fit_scaler(path)
+
+        model = create_pipeline()
+        regressor = model.named_steps['regressor']
+        regressor.set_params(**{**Config.STREAM_PARAMS, **(params or {})})
+
+        os.makedirs(Config.STREAM_CACHE_DIR, exist_ok=True)
+        cache_dir = tempfile.mkdtemp(dir=Config.STREAM_CACHE_DIR)
+        try:
+            logger.info(f"Training with {regressor.tree_method} on external memory in {cache_dir}...")
+            dtrain = xgb.DMatrix(ChunkIterator('train', scaler, os.path.join(cache_dir, 'train'), path))
+            logger.info(f"Training rows: {dtrain.num_row()}")
+            booster = xgb.train(regressor.get_xgb_params(), dtrain, num_boost_round=regressor.get_num_boosting_rounds())
+            del dtrain
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        set_booster(regressor, booster)
+
+        logger.info("Evaluating model...")
+        metrics = evaluate_streaming(model, scaler, path)
+        feature_importance = dict(zip(Config.FEATURE_COLUMNS, [float(x) for x in regressor.feature_importances_]))
+
+        if save:
+            save_evaluation(metrics, feature_importance)
+            with open(Config.SCALER_PATH, 'wb') as f:
+                pickle.dump(scaler, f)
+            with open(Config.MODEL_PATH, 'wb') as f:
+                pickle.dump(model, f)
+        logger.info(f"Streaming training completed: {metrics}")
+        return model, metrics
+
+    except Exception as e:
+        logger.error(f"Error in streaming training: {str(e)}")
+        raise
@@ -0,0 +1,282 @@
+import json
+import os
+import pickle
+import tempfile
+import numpy as np
+from config.config import Config
+from src.validation import feature_bounds
+from utils.logger import setup_logger
+
+logger = setup_logger('tree_compiler')
+
+
+class CompiledEnsemble:
+    """XGBoost regression trees flattened into NumPy arrays.
+
+    All trees share one node table. XGBoost allocates the right child
+    directly after the left one, so a step is ``left[node] + go_right``.
+    Leaves point to themselves and carry a NaN threshold (``x >= NaN`` is
+    never true), so every row can be walked through every tree in lockstep
+    for ``max_depth`` steps and then read its leaf values.
+
+    Thresholds are float32 for models that take scaled input. After
+    ``fold_scaler`` they are float64 in raw feature units.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots')
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots,
+                 base_score, max_depth):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        threshold = np.asarray(threshold)
+        self.threshold = threshold if threshold.dtype == np.float64 else threshold.astype(np.float32, copy=False)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_score = float(base_score)
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Compile a trained xgboost.Booster"""
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            booster.save_model(path)
+            with open(path) as f:
+                learner = json.load(f)['learner']
+        finally:
+            os.remove(path)
+
+        objective = learner['objective']['name']
+        booster_type = learner['gradient_booster']['name']
+        if objective != 'reg:squarederror' or booster_type != 'gbtree':
+            raise ValueError(f"Unsupported model: objective={objective}, booster={booster_type}")
+
+        feature, threshold, left, right, default_left, value, roots = ([] for _ in range(7))
+        max_depth = 0
+        offset = 0
+        for tree in learner['gradient_booster']['model']['trees']:
+            tree_left = np.asarray(tree['left_children'], dtype=np.int64)
+            tree_right = np.asarray(tree['right_children'], dtype=np.int64)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            n_nodes = len(tree_left)
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree_left == -1
+            if np.any(tree_right[~is_leaf] != tree_left[~is_leaf] + 1):
+                raise ValueError(f"Tree {tree['id']} has non-adjacent children")
+
+            # Leaves loop back onto themselves and never pass the NaN threshold
+            feature.append(np.where(is_leaf, 0, tree['split_indices']))
+            threshold.append(np.where(is_leaf, np.nan, conditions))
+            left.append(np.where(is_leaf, node_ids, tree_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree_right) + offset)
+            default_left.append(is_leaf | np.asarray(tree['default_left'], dtype=bool))
+            value.append(np.where(is_leaf, conditions, 0.0))
+            roots.append(offset)
+
+            # Depth of the deepest node reachable from the root
+            depth = np.zeros(n_nodes, dtype=np.int64)
+            for node in range(n_nodes):
+                if not is_leaf[node]:
+                    depth[tree_left[node]] = depth[node] + 1
+                    depth[tree_right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+            offset += n_nodes
+
+        base_score = float(learner['learner_model_param']['base_score'])
+        ensemble = cls(
+            np.concatenate(feature), np.concatenate(threshold),
+            np.concatenate(left), np.concatenate(right),
+            np.concatenate(default_left), np.concatenate(value),
+            roots, base_score, max_depth
+        )
+        logger.info(f"Compiled {ensemble.n_trees} trees ({offset} nodes, depth {max_depth})")
+        return ensemble
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile the regressor step of a trained sklearn Pipeline"""
+        regressor = model.named_steps['regressor'] if hasattr(model, 'named_steps') else model
+        return cls.from_booster(regressor.get_booster())
+
+    def fold_scaler(self, scaler):
+        """Return a copy whose thresholds take raw, unscaled feature values"""
+        internal = ~np.isnan(self.threshold)
+        feature = self.feature[internal]
+        threshold = np.full(len(self.threshold), np.nan, dtype=np.float64)
+        threshold[internal] = _raw_thresholds(
+            self.threshold[internal].astype(np.float32),
+            np.asarray(scaler.scale_, dtype=np.float64)[feature],
+            np.asarray(scaler.min_, dtype=np.float64)[feature]
+        )
+        return type(self)(
+            self.feature, threshold, self.left, self.right, self.default_left,
+            self.value, self.roots, self.base_score, self.max_depth
+        )
+
+    def save(self, path):
+        """Save as an uncompressed .npz archive"""
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                base_score=np.float64(self.base_score),
+                max_depth=np.int64(self.max_depth),
+                **{name: getattr(self, name) for name in self.ARRAYS}
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            return cls(base_score=data['base_score'], max_depth=data['max_depth'], **arrays)
+
+    def predict(self, X, chunk_size=Config.COMPILED_CHUNK_SIZE):
+        """Predict for a feature matrix, walking all trees at once"""
+        X = np.asarray(X, dtype=self.threshold.dtype)
+        n_rows = X.shape[0]
+        predictions = np.empty(n_rows, dtype=np.float32)
+
+        for start in range(0, n_rows, chunk_size):
+            X_chunk = X[start:start + chunk_size]
+            has_missing = bool(np.isnan(X_chunk).any())
+            flat = X_chunk.ravel()
+            offsets = (np.arange(len(X_chunk), dtype=np.int64) * X.shape[1])[:, None]
+            nodes = np.repeat(self.roots[None, :], len(X_chunk), axis=0)
+
+            for _ in range(self.max_depth):
+                x = flat[offsets + self.feature[nodes]]
+                go_right = x >= self.threshold[nodes]
+                if has_missing:
+                    go_right = np.where(np.isnan(x), ~self.default_left[nodes], go_right)
+                nodes = self.left[nodes] + go_right
+
+            predictions[start:start + chunk_size] = self.value[nodes].sum(axis=1) + np.float32(self.base_score)
+
+        return predictions
+
+
+def _to_ordered(x):
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = x.view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)))
+
+
+def _from_ordered(keys):
+    bits = np.where(keys >= 0, keys, (-keys) | np.int64(-0x8000000000000000))
+    return bits.view(np.float64)
+
+
+def _raw_thresholds(threshold, scale, offset):
+    """Smallest raw x per split with float32(x * scale + offset) >= threshold.
+
+    The scaled value is monotonic in x, so ``x >= result`` takes the right
+    branch exactly when the scaled comparison would. Found by bisecting
+    over the ordered bit patterns of float64.
+    """
+    def goes_right(x):
+        return (x * scale + offset).astype(np.float32) >= threshold
+
+    estimate = (threshold.astype(np.float64) - offset) / scale
+    width = np.maximum(np.abs(estimate), 1.0) * 1e-4
+    low, high = estimate - width, estimate + width
+    while True:
+        widen_low, widen_high = goes_right(low), ~goes_right(high)
+        if not (widen_low.any() or widen_high.any()):
+            break
+        low = np.where(widen_low, low - width, low)
+        high = np.where(widen_high, high + width, high)
+        width *= 2
+
+    low_key, high_key = _to_ordered(low), _to_ordered(high)
+    while np.any(high_key - low_key > 1):
+        mid_key = low_key + (high_key - low_key) // 2
+        right = goes_right(_from_ordered(mid_key))
+        high_key = np.where(right, mid_key, high_key)
+        low_key = np.where(right, low_key, mid_key)
+    return _from_ordered(high_key)
+
+
+def compile_model(model=None, path=Config.COMPILED_MODEL_PATH):
+    """Compile the trained model and save it next to best_model.pkl"""
+    try:
+        if model is None:
+            with open(Config.MODEL_PATH, 'rb') as f:
+                model = pickle.load(f)
+        ensemble = CompiledEnsemble.from_model(model)
+        ensemble.save(path)
+        logger.info(f"Compiled model saved to {path}")
+        return ensemble
+
+    except Exception as e:
+        logger.error(f"Error compiling model: {str(e)}")
+        raise
+
+
+def export_raw_model(model=None, scaler=None, path=Config.RAW_MODEL_PATH):
+    """Fold the MinMaxScaler into the split thresholds and save the result.
+
+    The exported ensemble takes raw FeatureInput values, so serving needs
+    neither scaler.pkl nor a scaling pass. Before saving it is checked
+    against scaler.transform + model.predict on the dataset and on random
+    inputs spanning Config.DATA_VALIDATION.
+    """
+    # Only needed for the check; serving imports this module for CompiledEnsemble
+    import pandas as pd
+    from src.dataset import load_columns
+    try:
+        if model is None:
+            with open(Config.MODEL_PATH, 'rb') as f:
+                model = pickle.load(f)
+        if scaler is None:
+            with open(Config.SCALER_PATH, 'rb') as f:
+                scaler = pickle.load(f)
+
+        ensemble = CompiledEnsemble.from_model(model)
+        folded = ensemble.fold_scaler(scaler)
+
+        # Equivalence check against the original scaler + model pipeline
+        rng = np.random.default_rng(Config.RANDOM_STATE)
+        low, high = feature_bounds()
+        # Dataset rows (sampled on datasets larger than memory) plus random in-range rows
+        dataset = load_columns(Config.FEATURE_COLUMNS)
+        n_rows = len(dataset[Config.FEATURE_COLUMNS[0]])
+        rows = slice(None)
+        if n_rows > Config.FOLD_CHECK_SAMPLES:
+            rows = np.sort(rng.choice(n_rows, Config.FOLD_CHECK_SAMPLES, replace=False))
+        X_check = np.vstack([
+            np.column_stack([dataset[c][rows] for c in Config.FEATURE_COLUMNS]).astype(np.float64),
+            rng.uniform(low, high, size=(Config.FOLD_CHECK_SAMPLES, len(low)))
+        ])
+        X_scaled = scaler.transform(pd.DataFrame(X_check, columns=Config.FEATURE_COLUMNS))
+        expected = model.predict(X_scaled)
+        unfolded = ensemble.predict(X_scaled)
+        raw = folded.predict(X_check)
+
+        leaf_mismatches = int(np.sum(raw != unfolded))
+        max_diff = float(np.max(np.abs(raw - expected)))
+        logger.info(
+            f"Folded model check on {len(X_check)} rows: max |diff| vs pipeline {max_diff:.2e}, "
+            f"{leaf_mismatches} rows differ from the scaled ensemble"
+        )
+        if leaf_mismatches or max_diff > Config.FOLD_CHECK_TOLERANCE:
+            raise ValueError("Folded model does not match the scaler + model pipeline")
+
+        folded.save(path)
+        logger.info(f"Raw-input model saved to {path}")
+        return folded
+
+    except Exception as e:
+        logger.error(f"Error exporting raw-input model: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    compile_model()
+    export_raw_model()
@@ -0,0 +1,50 @@
+from functools import lru_cache
+import numpy as np
+from config.config import Config
+
+
+@lru_cache(maxsize=None)
+def _compiled_bounds(columns):
+    ranges = [Config.get_feature_range(column) for column in columns]
+    low = np.array([r['min'] for r in ranges], dtype=np.float64)
+    high = np.array([r['max'] for r in ranges], dtype=np.float64)
+    low.flags.writeable = False
+    high.flags.writeable = False
+    return low, high
+
+
+@lru_cache(maxsize=None)
+def _integer_mask(columns):
+    mask = np.array([column in Config.INTEGER_FEATURES for column in columns])
+    mask.flags.writeable = False
+    return mask
+
+
+def feature_bounds(columns=None):
+    """Config.DATA_VALIDATION as (min, max) arrays in column order"""
+    return _compiled_bounds(tuple(columns or Config.FEATURE_COLUMNS))
+
+
+def validate_matrix(X, columns=None):
+    """Per-row, per-column violation mask (True = out of range, missing, or
+    not a whole number in an INTEGER_FEATURES column)"""
+    low, high = feature_bounds(columns)
+    X = np.asarray(X, dtype=np.float64)
+    fractional = _integer_mask(tuple(columns or Config.FEATURE_COLUMNS)) & (X != np.floor(X))
+    return ~((X >= low) & (X <= high)) | fractional
+
+
+def violation_messages(X, mask, columns=None):
+    """Readable error per invalid row, keyed by row position"""
+    columns = list(columns or Config.FEATURE_COLUMNS)
+    low, high = feature_bounds(columns)
+    X = np.asarray(X, dtype=np.float64)
+    messages = {}
+    for row in np.flatnonzero(mask.any(axis=1)):
+        parts = [
+            f"{columns[col]}={X[row, col]:g} (allowed {low[col]:g} to {high[col]:g})"
+            if not low[col] <= X[row, col] <= high[col] else f"{columns[col]}={X[row, col]:g} (must be a whole number)"
+            for col in np.flatnonzero(mask[row])
+        ]
+        messages[int(row)] = "Invalid value for " + ", ".join(parts)
+    return messages
@@ -1,24 +1,105 @@
+import argparse
+import pickle
+from config.config import Config
 from src.data_preparation import load_and_prepare_data
+from src.dataset import dataset_hash
 from src.model import create_pipeline, train_model
+from src.search import PARAM_GRID, STRATEGIES
+from src.streaming import train_streaming
 from src.evaluation import evaluate_model
+from src.inference import XGBoostPredictor
+from src.incremental import append_rows, save_training_state, train_incremental
+from src.tree_compiler import compile_model, export_raw_model
+from src.lattice import build_lattice
+from src.model_bundle import save_bundle
+from src.stages import model_digest, run_stage, stage_key
 from utils.logger import setup_logger
 
 logger = setup_logger('train')
 
-def main():
+def export_model(model):
+    with open(Config.SCALER_PATH, 'rb') as f:
+        scaler = pickle.load(f)
+    compile_model(model)
+    export_raw_model(model, scaler)
+    # Score the lattice with this model, not whatever load_predictor finds on disk
+    build_lattice(XGBoostPredictor(model, scaler))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the GPA prediction model")
+    parser.add_argument('--search', choices=sorted(STRATEGIES), default=Config.SEARCH_STRATEGY,
+                        help="hyperparameter search strategy")
+    parser.add_argument('--grid', choices=['default', 'full'], default='default',
+                        help="search space: the default 128-combination grid or Config.PARAMS")
+    parser.add_argument('--streaming', action='store_true',
+                        help="train out-of-core in chunks with Config.STREAM_PARAMS instead of searching")
+    parser.add_argument('--incremental', action='store_true',
+                        help="update the saved model with new rows; full search only on drift or failed thresholds")
+    parser.add_argument('--new-data', metavar='CSV',
+                        help="append these rows to the dataset first (with --incremental)")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="stop the search after this many seconds and keep the best so far")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="rerun every stage even if its inputs are unchanged")
+    return parser.parse_args()
+
+def main(args=None):
+    args = args or parse_args()
     try:
-        # Load dan prepare data
-        logger.info("Loading and preparing data...")
-        X_train, X_test, y_train, y_test, feature_names = load_and_prepare_data()
-
-        # Create dan train model
-        logger.info("Creating and training model...")
-        pipeline = create_pipeline()
-        model, feature_importance = train_model(pipeline, X_train, y_train, feature_names)
-
-        # Evaluasi model
-        logger.info("Evaluating model...")
-        metrics, _ = evaluate_model(model, X_train, X_test, y_train, y_test, feature_names)
+        result = None
+        if args.incremental:
+            if args.new_data:
+                append_rows(args.new_data)
+            logger.info("Updating the saved model incrementally...")
+            result = train_incremental()
+
+        if result is not None:
+            model, metrics, updated = result
+            # Deferred rows stay out of the state, so the next run still sees them as new
+            if updated:
+                save_training_state('incremental', model, metrics)
+        elif args.streaming:
+            # Chunked read, hash split, incremental scaler, external-memory XGBoost
+            logger.info("Training out-of-core...")
+            model, metrics = train_streaming()
+            save_training_state('streaming', model, metrics, split='hash')
+        else:
+            # Each stage is skipped when its code, Config fields and inputs are unchanged
+            force = args.no_cache
+
+            # Load dan prepare data
+            logger.info("Loading and preparing data...")
+            prepare_key = stage_key('prepare', data=dataset_hash())
+            X_train, X_test, y_train, y_test, feature_names = run_stage(
+                'prepare', prepare_key, load_and_prepare_data, force
+            )
+
+            # Create dan train model
+            logger.info("Creating and training model...")
+            train_key = stage_key('train', prepare=prepare_key, search=args.search, grid=args.grid,
+                                  time_budget=args.time_budget)
+            model, feature_importance = run_stage('train', train_key, lambda: train_model(
+                create_pipeline(), X_train, y_train, feature_names,
+                strategy=args.search,
+                param_grid=Config.PARAMS if args.grid == 'full' else PARAM_GRID,
+                time_budget=args.time_budget
+            ), force)
+
+            # Evaluasi model
+            logger.info("Evaluating model...")
+            evaluate_key = stage_key('evaluate', prepare=prepare_key, train=train_key)
+            metrics, _ = run_stage('evaluate', evaluate_key, lambda: evaluate_model(
+                model, X_train, X_test, y_train, y_test, feature_names
+            ), force)
+            save_training_state('full', model, metrics)
+
+        # Export trees for the compiled and raw serving modes, and precompute
+        # the prediction lattice for the lookup serving mode
+        logger.info("Exporting model...")
+        export_key = stage_key('export', model=model_digest(model))
+        run_stage('export', export_key, lambda: export_model(model), args.no_cache)
+        # Content-addressed, so an unchanged model only repoints CURRENT
+        save_bundle(model)
         
         logger.info("Training completed successfully")
         logger.info(f"Test R2 Score: {metrics['test_r2']:.4f}")
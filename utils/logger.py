@@ -1,28 +1,137 @@
+import atexit
+import itertools
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from config.config import Config
+
+_lock = threading.Lock()
+_queue = None
+_listener = None
+_dispatcher = None
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every N records whose message starts with a given prefix"""
+
+    def __init__(self, rules):
+        super().__init__()
+        self.rules = [(prefix, every, itertools.count()) for prefix, every in rules.items() if every > 1]
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        for prefix, every, counter in self.rules:
+            if isinstance(record.msg, str) and record.msg.startswith(prefix):
+                return next(counter) % every == 0
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is so message formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class _Dispatcher(logging.Handler):
+    """Route queued records to the console and to their logger's own file"""
+
+    def __init__(self, console):
+        super().__init__()
+        self.console = console
+        self.files = {}
+
+    def handle(self, record):
+        self.console.handle(record)
+        file_handler = self.files.get(record.name)
+        if file_handler is not None:
+            file_handler.handle(record)
+        return True
+
+
+def _start_listener():
+    global _queue, _listener
+    _queue = queue.Queue()
+    _listener = QueueListener(_queue, _dispatcher, respect_handler_level=False)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _after_fork_in_child():
+    # The listener thread does not survive fork(); give the child a fresh
+    # queue and listener and point the existing handlers at it
+    global _listener
+    if _listener is None:
+        return
+    old_queue = _queue
+    _listener = None
+    _start_listener()
+    for name in _dispatcher.files:
+        for handler in logging.getLogger(name).handlers:
+            if isinstance(handler, QueueHandler) and handler.queue is old_queue:
+                handler.queue = _queue
+
+
+def _queue_handler(name, formatter, f_handler):
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            c_handler = logging.StreamHandler()
+            c_handler.setFormatter(formatter)
+            _dispatcher = _Dispatcher(c_handler)
+            _start_listener()
+            atexit.register(_stop_listener)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_after_fork_in_child)
+        _dispatcher.files[name] = f_handler
+    return _DeferredQueueHandler(_queue)
+
+
+def setup_logger(name, async_mode=None, sampling=None):
+    """Setup logger with console and file output.
+
+    With ``Config.LOG_ASYNC`` the logger only enqueues records and a single
+    background listener thread formats them and does the console and file
+    I/O. ``Config.LOG_SAMPLING`` rules keep one in N matching INFO records.
+    Calling this again for the same name returns the configured logger.
+    """
+    logger = logging.getLogger(name)
+    if getattr(logger, '_setup_done', False):
+        return logger
 
-def setup_logger(name):
-    """Setup logger with file and console handlers"""
     # Create logs directory if it doesn't exist
     log_dir = Path('logs')
     log_dir.mkdir(exist_ok=True)
-    
-    logger = logging.getLogger(name)
+
     logger.setLevel(logging.INFO)
-    
-    # Create handlers
-    c_handler = logging.StreamHandler()
-    f_handler = logging.FileHandler(log_dir / f'{name}_{datetime.now():%Y%m%d}.log')
-    
+    async_mode = Config.LOG_ASYNC if async_mode is None else async_mode
+    sampling = Config.LOG_SAMPLING.get(name, {}) if sampling is None else sampling
+
     # Create formatters
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    c_handler.setFormatter(formatter)
+    formatter = logging.Formatter(Config.LOG_FORMAT)
+    f_handler = logging.FileHandler(log_dir / f'{name}_{datetime.now():%Y%m%d}.log')
     f_handler.setFormatter(formatter)
-    
+
     # Add handlers to logger
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
-    
-    return logger
\ No newline at end of file
+    if async_mode:
+        logger.addHandler(_queue_handler(name, formatter, f_handler))
+    else:
+        c_handler = logging.StreamHandler()
+        c_handler.setFormatter(formatter)
+        logger.addHandler(c_handler)
+        logger.addHandler(f_handler)
+
+    if sampling:
+        logger.addFilter(SamplingFilter(sampling))
+
+    logger._setup_done = True
+    return logger
@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    """Base for metrics with optional labels; children are created on first use"""
+
+    TYPE = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self._children[()]
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def expose(self, const_labels=()):
+        """Text lines for every child, with ``const_labels`` (name, value) pairs first"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        names = tuple(name for name, _ in const_labels) + self.labelnames
+        values = tuple(value for _, value in const_labels)
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.expose(self.name, names, values + key))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def expose(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {self.value}"]
+
+
+class Counter(_Metric):
+    TYPE = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class Gauge(_Metric):
+    TYPE = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def expose(self, name, labelnames, key):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, ('le', bound))} {cumulative}")
+        cumulative += self.counts[-1]
+        lines.append(f"{name}_bucket{_format_labels(labelnames, key, ('le', '+Inf'))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    """Context manager observing the elapsed wall time into a histogram"""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text format.
+
+    With ``process_label`` every series is labelled with the PID of the
+    process rendering it (read at scrape time, so it is right after a
+    fork). Forked workers each count on their own; the label keeps their
+    series apart so a scrape answered by another worker is not read as a
+    counter reset.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, process_label=None):
+        self.process_label = process_label
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """Register a callable returning (name, type, documentation, value) tuples at scrape time"""
+        self._collectors.append(collect)
+
+    def expose(self):
+        const_labels = ((self.process_label, os.getpid()),) if self.process_label else ()
+        labels = _format_labels(*zip(*const_labels)) if const_labels else ''
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose(const_labels))
+        for collect in self._collectors:
+            for name, metric_type, documentation, value in collect():
+                lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}",
+                              f"{name}{labels} {value}"])
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, errors, latency and in-flight requests.
+
+    Paths outside ``endpoints`` are grouped under "other" to keep label
+    cardinality bounded.
+    """
+
+    def __init__(self, app, requests_total, errors_total, duration, in_flight, endpoints):
+        self.app = app
+        self.requests_total = requests_total
+        self.errors_total = errors_total
+        self.duration = duration
+        self.in_flight = in_flight
+        self.endpoints = set(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = scope['path'] if scope['path'] in self.endpoints else 'other'
+        start = time.perf_counter()
+        scope.setdefault('state', {})['start_time'] = start
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        in_flight = self.in_flight.labels(endpoint=endpoint)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            self.duration.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+            self.requests_total.labels(endpoint=endpoint, status=status[0]).inc()
+            if status[0] >= 400:
+                self.errors_total.labels(endpoint=endpoint, status=status[0]).inc()
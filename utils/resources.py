@@ -0,0 +1,66 @@
+import math
+import os
+from config.config import Config
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_DIRS = ('/sys/fs/cgroup/cpu', '/sys/fs/cgroup/cpu,cpuacct')
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit():
+    """CPU quota of the container (e.g. ``docker run --cpus``), or None if unlimited"""
+    cpu_max = _read(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+    for directory in CGROUP_V1_DIRS:
+        quota = _read(os.path.join(directory, 'cpu.cfs_quota_us'))
+        period = _read(os.path.join(directory, 'cpu.cfs_period_us'))
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    return None
+
+
+def available_cpus():
+    """CPUs this process may use: its affinity mask capped by the cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+
+def split_threads(total, outer=0, inner=0):
+    """Split ``total`` cores into (outer jobs, inner threads per job).
+
+    Either side may be fixed; 0 means derive it from the other. With
+    neither fixed every core runs its own single-threaded job, which suits
+    many small independent fits.
+    """
+    if outer and inner:
+        return outer, inner
+    if outer:
+        return outer, max(1, total // outer)
+    if inner:
+        return max(1, total // inner), inner
+    return total, 1
+
+
+def plan_training(outer=None, inner=None):
+    """(outer CV jobs, XGBoost threads per fit) from Config"""
+    total = Config.TRAIN_CPUS or available_cpus()
+    outer = Config.TRAIN_OUTER_JOBS if outer is None else outer
+    inner = Config.TRAIN_INNER_THREADS if inner is None else inner
+    return split_threads(total, outer, inner)